@@ -0,0 +1,77 @@
+import os
+import math
+import time
+import threading
+from collections import Counter
+
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "30"))
+MAX_TIMEOUT_SECONDS = float(os.getenv("MAX_REQUEST_TIMEOUT_SECONDS", "120"))
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, stage):
+        self.stage = stage
+        super().__init__(f"Request deadline exceeded before stage '{stage}'")
+
+
+class DeadlineStats:
+    """Per-stage counters of requests whose deadline ran out at that stage."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, stage):
+        with self._lock:
+            self._counts[stage] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+deadline_stats = DeadlineStats()
+
+
+class Deadline:
+    """
+    Absolute time budget for one request, checked between pipeline stages.
+
+    Stages call ``check(stage)`` before starting work and use ``remaining()`` to
+    bound blocking calls; an exhausted budget is counted in ``deadline_stats``.
+    """
+
+    def __init__(self, seconds):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def from_header(cls, value=None):
+        """Deadline from an ``X-Request-Timeout-Ms`` value, else the configured default."""
+        if value is None or value == "":
+            return cls(DEFAULT_TIMEOUT_SECONDS)
+        try:
+            seconds = float(value) / 1000
+        except ValueError:
+            raise ValueError(f"Invalid {DEADLINE_HEADER} header: {value!r}")
+        # float() accepts "nan" and "inf"; nan would slip past every comparison below
+        if not math.isfinite(seconds):
+            raise ValueError(f"Invalid {DEADLINE_HEADER} header: {value!r}")
+        if seconds <= 0:
+            raise ValueError(f"{DEADLINE_HEADER} must be positive")
+        return cls(min(seconds, MAX_TIMEOUT_SECONDS))
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def exceeded(self, stage):
+        deadline_stats.record(stage)
+        return DeadlineExceeded(stage)
+
+    def check(self, stage):
+        if self.expired():
+            raise self.exceeded(stage)
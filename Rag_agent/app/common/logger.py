@@ -1,19 +1,212 @@
-import logging
 import os
-from datetime import datetime
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, date
 
-LOGS_DIR = "logs"
+LOGS_DIR = os.getenv("LOG_DIR", "logs")
 os.makedirs(LOGS_DIR,exist_ok=True)
 
-LOG_FILE = os.path.join(LOGS_DIR, f"log_{datetime.now().strftime('%Y-%m-%d')}.log")
+LOG_FILE = os.path.join(LOGS_DIR, "app.log")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "7"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Records at or above this level are also written synchronously to stderr, so startup
+# problems show up in container logs; keep it high enough that request logging stays off it
+LOG_CONSOLE_LEVEL = os.getenv("LOG_CONSOLE_LEVEL", "WARNING").upper()
+
+_STOP = object()
+
+
+class BatchingFileWriter:
+    """
+    JSON-lines file fed through a bounded queue and written by one background thread.
+
+    ``submit`` never blocks: when the queue is full the record is dropped and
+    counted, and the writer logs how many were lost once it catches up. The
+    writer drains up to ``batch_size`` records per write and rotates the file to
+    ``<path>.1`` .. ``.N`` when it passes ``max_bytes`` or, with ``rotate_daily``,
+    when the day changes. ``prepare``, if given, is applied to each entry on the
+    writer thread just before serialisation.
+    """
+
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS, rotate_daily=True,
+                 queue_size=LOG_QUEUE_SIZE, batch_size=512, flush_interval=0.5, name="log-writer",
+                 prepare=None):
+        self.path = path
+        self.prepare = prepare
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.rotate_daily = rotate_daily
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self._dropped_reported = 0
+        self._drop_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._opened_on = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, entry):
+        """Enqueue a JSON-serialisable dict; returns False if it was dropped."""
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(entry is _STOP for entry in batch)
+            entries = [entry for entry in batch if entry is not _STOP]
+            dropped = self.dropped - self._dropped_reported
+            if dropped:
+                self._dropped_reported += dropped
+                entries.append({
+                    "ts": datetime.now().isoformat(timespec="milliseconds"),
+                    "level": "WARNING",
+                    "logger": __name__,
+                    "msg": f"Dropped {dropped} records: write queue full",
+                })
+            if entries:
+                try:
+                    self._write(entries)
+                except Exception as e:
+                    # Losing a batch is better than losing the writer thread and every later record
+                    sys.stderr.write(f"Error writing {self.path}: {e!r}\n")
+            if stop:
+                break
+
+    def _write(self, entries):
+        if self.prepare is not None:
+            entries = [self.prepare(entry) for entry in entries]
+        data = "".join(
+            json.dumps(entry, separators=(",", ":"), ensure_ascii=False, default=str) + "\n"
+            for entry in entries
+        ).encode("utf-8")
+        try:
+            self._open_or_rotate(len(data))
+            self._file.write(data)
+            self._file.flush()
+            self.written += len(entries)
+            self.batches += 1
+        except OSError as e:
+            sys.stderr.write(f"Error writing {self.path}: {e}\n")
+
+    def _open_or_rotate(self, incoming):
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            self._opened_on = date.today()
+        new_day = self.rotate_daily and date.today() != self._opened_on
+        if new_day or (self._file.tell() and self._file.tell() + incoming > self.max_bytes):
+            self._rotate()
 
-logging.basicConfig(
-    filename=LOG_FILE,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+    def _rotate(self):
+        self._file.close()
+        # If a rename below fails, the next write reopens the file instead of using the closed one
+        self._file = None
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "ab")
+        self._opened_on = date.today()
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+        }
+
+    def close(self, timeout=5.0):
+        """Flush what is queued and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def format_log_timestamp(entry):
+    # Handlers pass the raw epoch time; formatting it on the writer keeps producers cheap
+    if isinstance(entry.get("ts"), float):
+        entry["ts"] = datetime.fromtimestamp(entry["ts"]).isoformat(timespec="milliseconds")
+    return entry
+
+
+class QueueJSONHandler(logging.Handler):
+    """Turns log records into dicts on the caller's thread and hands them to the writer."""
+
+    _formatter = logging.Formatter()
+
+    def __init__(self, writer, level=logging.NOTSET):
+        super().__init__(level)
+        self.writer = writer
+
+    def emit(self, record):
+        try:
+            entry = {
+                "ts": record.created,
+                "level": record.levelname,
+                "logger": record.name,
+                "msg": record.getMessage(),
+                "thread": record.threadName,
+            }
+            if record.exc_info:
+                entry["exc"] = self._formatter.formatException(record.exc_info)
+            self.writer.submit(entry)
+        except Exception:
+            self.handleError(record)
+
+
+_writer = BatchingFileWriter(LOG_FILE, prepare=format_log_timestamp)
+_root = logging.getLogger()
+_root.addHandler(QueueJSONHandler(_writer))
+if not any(type(handler) is logging.StreamHandler for handler in _root.handlers):
+    _console = logging.StreamHandler()
+    _console.setLevel(LOG_CONSOLE_LEVEL)
+    _console.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"))
+    _root.addHandler(_console)
+_root.setLevel(logging.INFO)
 
 def get_logger(name):
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
-    return logger
\ No newline at end of file
+    return logger
+
+def logging_stats():
+    return _writer.stats()
@@ -0,0 +1,233 @@
+import os
+import re
+import sys
+import time
+import uuid
+import threading
+import tracemalloc
+from collections import Counter
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Profiler of the request running on this thread, if any
+_active = threading.local()
+
+
+def profile_requested(flag):
+    """True if a header or query value asks for this request to be profiled."""
+    return flag is not None and str(flag).lower() in ("1", "true", "yes")
+
+
+def submit_profiled(executor, fn, *args, **kwargs):
+    """``executor.submit`` that keeps the worker's stack in the calling request's profile."""
+    profiler = getattr(_active, "profiler", None)
+    if profiler is None:
+        return executor.submit(fn, *args, **kwargs)
+    return executor.submit(profiler.run_attached, fn, *args, **kwargs)
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread at a fixed interval from a helper thread.
+
+    Nothing is installed on the profiled thread (no sys.setprofile), so the cost
+    is confined to requests that ask for it. Work the request hands to a pool via
+    ``submit_profiled`` is sampled too, under a ``[thread-name]`` root frame.
+    ``folded()`` returns the collapsed-stack format understood by flamegraph.pl
+    and speedscope.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._workers = {}
+        self._workers_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_attached(self, fn, *args, **kwargs):
+        """Run ``fn`` on the current (worker) thread, sampling it while it runs."""
+        thread_id = threading.get_ident()
+        with self._workers_lock:
+            self._workers[thread_id] = f"[{threading.current_thread().name}]"
+        _active.profiler = self
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _active.profiler = None
+            with self._workers_lock:
+                self._workers.pop(thread_id, None)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._workers_lock:
+                threads = [(self.thread_id, None)] + list(self._workers.items())
+            for thread_id, root in threads:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if root:
+                    stack.append(root)
+                self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileStore:
+    """Runs calls under the sampling profiler and keeps the newest profiles on disk."""
+
+    def __init__(self, profile_dir, interval=0.005, keep=50):
+        self.profile_dir = profile_dir
+        self.interval = interval
+        self.keep = keep
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            profile_dir=os.getenv("PROFILE_DIR", os.path.join("logs", "profiles")),
+            interval=float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000,
+            keep=int(os.getenv("PROFILE_KEEP", "50")),
+        )
+
+    def profile(self, fn, *args, **kwargs):
+        """Call ``fn`` on the current thread while sampling it; return ``(result, profile_id)``."""
+        profiler = SamplingProfiler(threading.get_ident(), self.interval)
+        start = time.perf_counter()
+        profiler.start()
+        _active.profiler = profiler
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            _active.profiler = None
+            profiler.stop()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        profile_id = self.save(profiler.folded())
+        logger.info(f"Saved profile {profile_id} ({sum(profiler.samples.values())} samples, {elapsed_ms:.0f} ms)")
+        return result, profile_id
+
+    def save(self, folded):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profile_id = uuid.uuid4().hex
+        with open(os.path.join(self.profile_dir, f"{profile_id}.folded"), "w", encoding="utf-8") as f:
+            f.write(folded)
+        self._prune()
+        return profile_id
+
+    def load(self, profile_id):
+        """Return the folded profile text, or None for unknown or malformed ids."""
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = os.path.join(self.profile_dir, f"{profile_id}.folded")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _prune(self):
+        files = sorted(
+            (os.path.join(self.profile_dir, name) for name in os.listdir(self.profile_dir) if name.endswith(".folded")),
+            key=os.path.getmtime
+        )
+        for path in files[:-self.keep]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    # Peak rather than current RSS; ru_maxrss is KiB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def tracemalloc_top(limit=15):
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "traced_bytes": current,
+        "traced_peak_bytes": peak,
+        "top": [
+            {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:limit]
+        ],
+    }
+
+
+def embedding_model_bytes(embeddings):
+    model = getattr(embeddings, "_client", None) or getattr(embeddings, "client", None)
+    if model is None or not hasattr(model, "parameters"):
+        return None
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def faiss_index_bytes(store):
+    index = store.index
+    # Flat indexes store ntotal fixed-size codes; code_size is in bytes
+    return index.ntotal * getattr(index, "code_size", index.d * 4)
+
+
+def docstore_bytes(store):
+    docs = getattr(store.docstore, "_dict", {})
+    return sum(
+        sys.getsizeof(doc.page_content) + sys.getsizeof(doc.metadata)
+        + sum(sys.getsizeof(v) for v in doc.metadata.values())
+        for doc in docs.values()
+    )
+
+
+def memory_report(rag, top=15):
+    """RSS, tracemalloc top allocators and the size of the RAG building blocks."""
+    report = {
+        "rss_bytes": rss_bytes(),
+        "tracemalloc": tracemalloc_top(top),
+        "embedding_model_bytes": None,
+        "indexes": {},
+    }
+    if rag is None:
+        return report
+
+    report["embedding_model_bytes"] = embedding_model_bytes(rag.embeddings)
+    loaded = {"": rag.index} if rag.index is not None else {}
+    loaded.update({f"{key}/": index for key, index in rag.registry.resident().items()})
+    for prefix, index in loaded.items():
+        stores = getattr(index.vector_store, "shards", None) or {"default": index.vector_store}
+        for name, store in stores.items():
+            report["indexes"][prefix + name] = {
+                "vectors": store.index.ntotal,
+                "faiss_index_bytes": faiss_index_bytes(store),
+                "docstore_bytes": docstore_bytes(store),
+            }
+    return report
@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import hashlib
+
+from .logger import BatchingFileWriter
+
+TRACE_FILE_NAME = "traces.jsonl"
+
+
+def prompt_hash(prompt):
+    return hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class TraceRecorder:
+    """
+    Opt-in, append-only capture of chat requests for replay and capacity planning.
+
+    One compact JSON object per line in ``<trace_dir>/traces.jsonl``, written off
+    the request thread by a ``BatchingFileWriter``; the file is rotated to
+    ``traces.jsonl.1`` .. ``.N`` once it passes ``max_bytes``. When
+    ``store_prompts`` is False only a hash of the prompt is kept, which is enough
+    to spot hot queries but not to replay them.
+    """
+
+    def __init__(self, trace_dir, enabled=False, store_prompts=True, max_bytes=50 * 1024 * 1024, backups=5):
+        self.enabled = enabled
+        self.store_prompts = store_prompts
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.path = os.path.join(trace_dir, TRACE_FILE_NAME)
+        self._writer = None
+        if enabled:
+            os.makedirs(trace_dir, exist_ok=True)
+            self._writer = BatchingFileWriter(
+                self.path, max_bytes=max_bytes, backups=backups, rotate_daily=False, name="trace-writer"
+            )
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            trace_dir=os.getenv("TRACE_DIR", os.path.join("logs", "traces")),
+            enabled=os.getenv("TRACE_ENABLED", "false").lower() in ("1", "true", "yes"),
+            store_prompts=os.getenv("TRACE_PROMPTS", "text").lower() != "hash",
+            max_bytes=int(os.getenv("TRACE_MAX_BYTES", str(50 * 1024 * 1024))),
+            backups=int(os.getenv("TRACE_BACKUPS", "5")),
+        )
+
+    def record(self, backend, prompt, started_at, result=None, session_id=None, shards=None,
+               filter=None, status=200, response_bytes=0, index=None):
+        """Append one trace record. No-op unless tracing is enabled."""
+        if not self.enabled:
+            return
+        record = {
+            "ts": round(started_at, 6),
+            "backend": backend,
+            "session": session_id,
+            "prompt_hash": prompt_hash(prompt),
+            "prompt_len": len(prompt),
+            "status": status,
+            "total_ms": round((time.time() - started_at) * 1000, 2),
+            "response_bytes": response_bytes,
+        }
+        if self.store_prompts:
+            record["prompt"] = prompt
+        if index:
+            record["index"] = index
+        if shards:
+            record["shards"] = shards
+        if filter:
+            record["filter"] = filter
+        if result is not None:
+            record["stages"] = result.timings
+            record["chunk_ids"] = result.chunk_ids
+            record["index_version"] = result.index_version
+            if result.cached:
+                record["cached"] = True
+            if result.prefetched:
+                record["prefetched"] = True
+            if result.deadline_exceeded:
+                record["deadline_exceeded"] = result.deadline_exceeded
+            if result.error:
+                record["error"] = result.error
+        self._writer.submit(record)
+
+    def stats(self):
+        return self._writer.stats() if self._writer else None
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def read_traces(paths):
+    """Yield trace records from ``paths`` (oldest rotated file first), skipping bad lines."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+trace_recorder = TraceRecorder.from_env()
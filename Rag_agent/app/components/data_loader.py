@@ -26,6 +26,7 @@ from app.common.logger import get_logger
 from app.common.custom_exception import CustomException    
 from pdf_loader import load_pdf_files, split_docs
 from vector_store import save_db_faiss, load_db_faiss, huggingface_embedding
+from app.components.dedup import dedup_documents
 
 logger = get_logger(__name__)
 
@@ -40,6 +41,8 @@ def load_and_save_pdf_data():
         if not text_chunks:
             logger.warning("No text chunks created from the documents.")
             return None
+        # dedup_documents logs its own report
+        text_chunks, _ = dedup_documents(text_chunks)
         embedding_model = huggingface_embedding()
         if not embedding_model:
             logger.error("Embedding model could not be loaded.")
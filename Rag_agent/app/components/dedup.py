@@ -0,0 +1,146 @@
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.common.logger import get_logger
+from app.common.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+DEFAULT_THRESHOLD = 0.85
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: pairs above ~0.7 Jaccard become LSH candidates
+SHINGLE_WORDS = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        # 32-bit shingle hashes keep a * h + b below 2**64, so no overflow
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set), dtype=np.uint64)
+        return ((np.outer(self.a, hashes) + self.b[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+
+class DedupReport:
+    def __init__(self, chunks_before, chunks_after, chars_before, chars_after, clusters):
+        self.chunks_before = chunks_before
+        self.chunks_after = chunks_after
+        self.chars_before = chars_before
+        self.chars_after = chars_after
+        self.clusters = clusters
+
+    @property
+    def removed(self):
+        return self.chunks_before - self.chunks_after
+
+    def summary(self):
+        pct = 100 * self.removed / self.chunks_before if self.chunks_before else 0.0
+        return (
+            f"{self.chunks_before} -> {self.chunks_after} chunks "
+            f"({self.removed} near-duplicates in {self.clusters} clusters, -{pct:.1f}%), "
+            f"{self.chars_before} -> {self.chars_after} chars"
+        )
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _merge_metadata(docs):
+    """Scalar where all duplicates agree, else the list of distinct values (representative's first)."""
+    merged = {}
+    for doc in docs:
+        for key, value in doc.metadata.items():
+            values = merged.setdefault(key, [])
+            for v in value if isinstance(value, list) else [value]:
+                if v not in values:
+                    values.append(v)
+    merged = {key: values[0] if len(values) == 1 else values for key, values in merged.items()}
+    merged["duplicate_count"] = len(docs)
+    return merged
+
+
+def dedup_documents(documents, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+    """
+    Collapse near-duplicate chunks using MinHash signatures and LSH banding.
+
+    LSH candidates are confirmed with the exact Jaccard similarity of their word
+    shingles. Each cluster of duplicates is replaced by its longest chunk, carrying
+    the merged metadata of the whole cluster. Returns ``(documents, DedupReport)``.
+    """
+    try:
+        if len(documents) < 2:
+            chars = sum(len(d.page_content) for d in documents)
+            return list(documents), DedupReport(len(documents), len(documents), chars, chars, 0)
+
+        rows = num_perm // bands
+        hasher = MinHasher(num_perm)
+        shingle_sets = [shingles(doc.page_content) for doc in documents]
+        signatures = [hasher.signature(s) for s in shingle_sets]
+
+        buckets = defaultdict(list)
+        for i, sig in enumerate(signatures):
+            for band in range(bands):
+                buckets[(band, sig[band * rows:(band + 1) * rows].tobytes())].append(i)
+
+        parent = list(range(len(documents)))
+        checked = set()
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    i, j = members[x], members[y]
+                    if (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+                    a, b = shingle_sets[i], shingle_sets[j]
+                    if len(a & b) / len(a | b) >= threshold:
+                        parent[_find(parent, j)] = _find(parent, i)
+
+        clusters = defaultdict(list)
+        for i in range(len(documents)):
+            clusters[_find(parent, i)].append(i)
+
+        deduped = []
+        duplicate_clusters = 0
+        for root in sorted(clusters):
+            members = clusters[root]
+            if len(members) == 1:
+                deduped.append(documents[members[0]])
+                continue
+            duplicate_clusters += 1
+            # Keep the longest chunk first so its metadata values lead the merged lists
+            members.sort(key=lambda i: -len(documents[i].page_content))
+            cluster_docs = [documents[i] for i in members]
+            deduped.append(Document(page_content=cluster_docs[0].page_content, metadata=_merge_metadata(cluster_docs)))
+
+        report = DedupReport(
+            len(documents),
+            len(deduped),
+            sum(len(d.page_content) for d in documents),
+            sum(len(d.page_content) for d in deduped),
+            duplicate_clusters
+        )
+        logger.info(f"Deduplicated chunks: {report.summary()}")
+        return deduped, report
+    except Exception as e:
+        logger.error(f"Error deduplicating documents: {e}")
+        raise CustomException(f"Error deduplicating documents: {e}")
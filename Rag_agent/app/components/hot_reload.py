@@ -0,0 +1,139 @@
+import os
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+
+from app.common.logger import get_logger
+from app.components.metadata_index import MetadataIndex
+
+logger = get_logger(__name__)
+
+INDEX_FILES = ("index.faiss", "index.pkl")
+VERSION_FILE = "VERSION"
+
+STAGING_MARKERS = (".staging-", ".previous-")
+
+
+def is_index_dir(parent, name):
+    """True if ``parent/name`` holds a published (not staging or retired) FAISS index."""
+    if any(marker in name for marker in STAGING_MARKERS):
+        return False
+    return os.path.exists(os.path.join(parent, name, INDEX_FILES[0]))
+
+
+def index_version(path):
+    """
+    Return the version string of the FAISS index stored at ``path``.
+
+    A ``VERSION`` file written by the index builder wins; otherwise the version
+    is a short fingerprint of the size and mtime of the index files so that any
+    rebuild in place is still detected. For a shard root (subdirectories each
+    holding an index) the version combines the versions of all shards.
+    """
+    if os.path.isdir(path) and not os.path.exists(os.path.join(path, INDEX_FILES[0])):
+        shard_versions = [
+            f"{name}={index_version(os.path.join(path, name))}"
+            for name in sorted(os.listdir(path))
+            if is_index_dir(path, name)
+        ]
+        if not shard_versions:
+            return None
+        return hashlib.sha1(";".join(shard_versions).encode()).hexdigest()[:12]
+
+    version_file = os.path.join(path, VERSION_FILE)
+    if os.path.exists(version_file):
+        with open(version_file, "r", encoding="utf-8") as f:
+            version = f.read().strip()
+        if version:
+            return version
+
+    fingerprint = hashlib.sha1()
+    for name in INDEX_FILES:
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path):
+            return None
+        stat = os.stat(file_path)
+        fingerprint.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return fingerprint.hexdigest()[:12]
+
+
+class IndexWatcher:
+    """
+    Polls an index directory and calls ``on_change`` when its version changes.
+
+    The callback runs on the watcher thread, so a reload never blocks request
+    handling. A version is marked as handled only once ``on_change`` returns True;
+    if it returns False (e.g. another reload holds the lock) the next poll tries
+    again. Reloads that raise are logged and retried on the next version bump.
+    """
+
+    def __init__(self, path, on_change, interval=30.0):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_version = index_version(path)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="index-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {self.path} for index changes every {self.interval}s")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                version = index_version(self.path)
+                if version is None or version == self._last_version:
+                    continue
+                logger.info(f"Index version changed: {self._last_version} -> {version}")
+                try:
+                    reloaded = self.on_change()
+                except Exception:
+                    # A broken publish is not reloaded again on every poll
+                    self._last_version = version
+                    raise
+                if not reloaded:
+                    logger.info("Index reload did not run; retrying on the next poll")
+                    continue
+                self._last_version = version
+            except Exception as e:
+                logger.error(f"Error reloading index from watcher: {e}")
+
+
+def publish_index(vector_store, path, version=None):
+    """
+    Save ``vector_store`` to ``path`` so a watching server never sees a partial index.
+
+    The index is written to a sibling staging directory together with its
+    ``VERSION`` file and metadata filter index, then renamed into place; the previous directory is
+    removed only after the new one is live.
+    """
+    version = version or datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.abspath(path)
+    staging_path = f"{path}.staging-{version}"
+    previous_path = f"{path}.previous-{version}"
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    vector_store.save_local(staging_path)
+    MetadataIndex.build(vector_store).save(staging_path)
+    with open(os.path.join(staging_path, VERSION_FILE), "w", encoding="utf-8") as f:
+        f.write(version)
+
+    if os.path.exists(path):
+        os.rename(path, previous_path)
+    os.rename(staging_path, path)
+    if os.path.exists(previous_path):
+        shutil.rmtree(previous_path, ignore_errors=True)
+
+    logger.info(f"Published index version {version} to {path}")
+    return version
@@ -0,0 +1,229 @@
+import os
+import gc
+import time
+import threading
+from collections import OrderedDict
+
+from app.common.logger import get_logger
+from app.common.profiling import docstore_bytes, faiss_index_bytes
+from app.components.hot_reload import STAGING_MARKERS, is_index_dir
+from app.components.sharded_store import is_sharded
+
+logger = get_logger(__name__)
+
+INDEXES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "vectorstore", "indexes"
+)
+# Kept next to the index directory, not inside it, so republishing the index does not wipe it
+PROMPT_SUFFIX = ".prompt.txt"
+
+
+class IndexSpec:
+    """Where a named index lives and, optionally, the prompt template it is served with."""
+
+    def __init__(self, key, path, prompt_path=None):
+        self.key = key
+        self.path = path
+        self.prompt_path = prompt_path
+
+    def load_prompt(self):
+        """The template from ``prompt_path``, or None to use the default persona prompt."""
+        if not self.prompt_path:
+            return None
+        with open(self.prompt_path, "r", encoding="utf-8") as f:
+            prompt = f.read()
+        if "{context}" not in prompt or "{question}" not in prompt:
+            raise RuntimeError(f"Prompt template {self.prompt_path} must contain {{context}} and {{question}}")
+        return prompt
+
+
+def discover_indexes(root):
+    """``{key: IndexSpec}`` for every published index (plain or sharded) directly under ``root``."""
+    if not os.path.isdir(root):
+        return {}
+    specs = {}
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if any(marker in name for marker in STAGING_MARKERS) or not os.path.isdir(path):
+            continue
+        if not (is_index_dir(root, name) or is_sharded(path)):
+            continue
+        prompt_path = os.path.join(root, name + PROMPT_SUFFIX)
+        specs[name] = IndexSpec(name, path, prompt_path if os.path.exists(prompt_path) else None)
+    return specs
+
+
+def index_memory_bytes(index):
+    """Estimated resident size of a ``LoadedIndex``: FAISS codes plus docstore contents."""
+    stores = getattr(index.vector_store, "shards", None) or {"default": index.vector_store}
+    return sum(faiss_index_bytes(store) + docstore_bytes(store) for store in stores.values())
+
+
+def _new_stats():
+    return {"hits": 0, "loads": 0, "evictions": 0, "load_seconds": None, "last_used": None}
+
+
+class IndexRegistry:
+    """
+    Named indexes served side by side, loaded on first use and evicted least-recently-used.
+
+    ``load(spec)`` builds a ``LoadedIndex``; the registry only decides which ones
+    stay resident. After each load, the coldest indexes are dropped until the
+    estimated size of the resident ones fits ``memory_budget`` bytes (0 means no
+    limit); the index just loaded is never evicted. Requests still holding an
+    evicted index finish on it, as with a hot swap. Concurrent first requests
+    for the same key share a single load. Unknown keys trigger a rescan of
+    ``root`` at most once per ``rescan_interval`` seconds, so clients sending
+    random keys cannot force a directory walk per request.
+    """
+
+    def __init__(self, root, load, memory_budget=0, rescan_interval=30.0):
+        self.root = root
+        self.memory_budget = memory_budget
+        self.rescan_interval = rescan_interval
+        self._load = load
+        self._last_scan = 0.0
+        self._scan_lock = threading.Lock()
+        self._specs = {}
+        self._loaded = OrderedDict()
+        self._memory = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.refresh()
+
+    @classmethod
+    def from_env(cls, load):
+        return cls(
+            os.getenv("INDEXES_DIR", INDEXES_DIR),
+            load,
+            memory_budget=int(float(os.getenv("INDEX_MEMORY_BUDGET_MB", "0")) * 1024 * 1024),
+            rescan_interval=float(os.getenv("INDEX_RESCAN_INTERVAL", "30")),
+        )
+
+    def refresh(self):
+        """Rescan ``root`` for published indexes; returns the available keys."""
+        specs = discover_indexes(self.root)
+        with self._lock:
+            self._specs = specs
+            self._last_scan = time.monotonic()
+        return sorted(specs)
+
+    def _maybe_refresh(self):
+        # One rescan per interval; concurrent misses don't queue up behind it
+        if time.monotonic() - self._last_scan < self.rescan_interval:
+            return
+        if not self._scan_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._last_scan >= self.rescan_interval:
+                self.refresh()
+        finally:
+            self._scan_lock.release()
+
+    def keys(self):
+        return sorted(self._specs)
+
+    def _touch(self, key):
+        # Caller holds self._lock
+        index = self._loaded.get(key)
+        if index is not None:
+            self._loaded.move_to_end(key)
+            stats = self._stats[key]
+            stats["hits"] += 1
+            stats["last_used"] = time.time()
+        return index
+
+    def get(self, key):
+        """The ``LoadedIndex`` for ``key``, loading it (and evicting cold ones) if needed."""
+        with self._lock:
+            index = self._touch(key)
+            if index is not None:
+                return index
+
+        spec = self._specs.get(key)
+        if spec is None:
+            # Collections published since the last scan are picked up without a restart
+            self._maybe_refresh()
+            spec = self._specs.get(key)
+        if spec is None:
+            raise ValueError(f"Unknown index '{key}'. Available indexes: {', '.join(self.keys()) or 'none'}")
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                index = self._touch(key)
+                if index is not None:
+                    return index
+
+            index = self._load(spec)
+            memory = index_memory_bytes(index)
+            with self._lock:
+                stats = self._stats.setdefault(key, _new_stats())
+                stats["loads"] += 1
+                stats["load_seconds"] = round(index.load_seconds, 3)
+                stats["last_used"] = time.time()
+                self._loaded[key] = index
+                self._memory[key] = memory
+                evicted = self._evict(keep=key)
+
+        logger.info(
+            f"Loaded index '{key}' (version {index.version}, {memory / 1024 / 1024:.1f} MB) "
+            f"in {index.load_seconds:.2f}s"
+        )
+        if evicted:
+            logger.info(f"Evicted cold indexes to stay within the memory budget: {evicted}")
+            gc.collect()
+        if self.memory_budget and memory > self.memory_budget:
+            logger.warning(f"Index '{key}' alone exceeds INDEX_MEMORY_BUDGET_MB ({memory} > {self.memory_budget} bytes)")
+        return index
+
+    def _evict(self, keep):
+        # Caller holds self._lock
+        evicted = []
+        if not self.memory_budget:
+            return evicted
+        while len(self._loaded) > 1 and sum(self._memory.values()) > self.memory_budget:
+            key = next(iter(self._loaded))
+            if key == keep:
+                break
+            self._drop(key)
+            evicted.append(key)
+        return evicted
+
+    def _drop(self, key):
+        del self._loaded[key]
+        self._memory.pop(key, None)
+        self._stats[key]["evictions"] += 1
+
+    def unload(self, key):
+        """Drop ``key`` so the next request loads it from disk again. Returns False if it was not loaded."""
+        with self._lock:
+            if key not in self._loaded:
+                return False
+            self._drop(key)
+        gc.collect()
+        return True
+
+    def resident(self):
+        with self._lock:
+            return dict(self._loaded)
+
+    def stats(self):
+        with self._lock:
+            per_index = {}
+            for key in sorted(set(self._specs) | set(self._stats)):
+                index = self._loaded.get(key)
+                per_index[key] = {
+                    "loaded": index is not None,
+                    "version": index.version if index else None,
+                    "memory_bytes": self._memory.get(key),
+                    **self._stats.get(key, _new_stats()),
+                }
+            return {
+                "root": self.root,
+                "memory_budget_bytes": self.memory_budget or None,
+                "resident_bytes": sum(self._memory.values()),
+                "indexes": per_index,
+            }
@@ -0,0 +1,122 @@
+import os
+import json
+from collections import defaultdict
+
+import faiss
+import numpy as np
+
+from app.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+METADATA_INDEX_FILE = "metadata_index.json"
+INDEXED_FIELDS = ("source", "page", "type", "person")
+
+
+def _values(value):
+    """Metadata values are indexed as strings; list values index every element."""
+    if isinstance(value, (list, tuple, set)):
+        return [str(v) for v in value]
+    return [str(value)]
+
+
+class MetadataIndex:
+    """
+    Precomputed ``field -> value -> FAISS ids`` sets for one FAISS index.
+
+    ``select`` turns a filter such as ``{"type": "project", "page": [1, 2]}`` into
+    the sorted id array to hand FAISS as an ``IDSelector``: values of one field are
+    OR-ed, fields are AND-ed.
+    """
+
+    def __init__(self, postings, ntotal):
+        self.postings = postings
+        self.ntotal = ntotal
+
+    @classmethod
+    def build(cls, store, fields=INDEXED_FIELDS):
+        postings = {field: defaultdict(list) for field in fields}
+        for faiss_id, doc_id in store.index_to_docstore_id.items():
+            doc = store.docstore.search(doc_id)
+            metadata = getattr(doc, "metadata", None) or {}
+            for field in fields:
+                if field in metadata:
+                    for value in _values(metadata[field]):
+                        postings[field][value].append(faiss_id)
+        return cls(
+            {
+                field: {value: np.unique(np.asarray(ids, dtype=np.int64)) for value, ids in values.items()}
+                for field, values in postings.items()
+            },
+            store.index.ntotal
+        )
+
+    def save(self, path):
+        data = {
+            "ntotal": self.ntotal,
+            "fields": {
+                field: {value: ids.tolist() for value, ids in values.items()}
+                for field, values in self.postings.items()
+            }
+        }
+        with open(os.path.join(path, METADATA_INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, METADATA_INDEX_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            {
+                field: {value: np.asarray(ids, dtype=np.int64) for value, ids in values.items()}
+                for field, values in data["fields"].items()
+            },
+            data["ntotal"]
+        )
+
+    @classmethod
+    def load_or_build(cls, store, path):
+        """Load the saved index, rebuilding it if missing or stale (older stores)."""
+        if os.path.exists(os.path.join(path, METADATA_INDEX_FILE)):
+            metadata_index = cls.load(path)
+            if metadata_index.ntotal == store.index.ntotal:
+                return metadata_index
+            logger.warning(f"Metadata index at {path} is stale, rebuilding")
+        return cls.build(store)
+
+    @property
+    def fields(self):
+        return list(self.postings)
+
+    def values(self, field):
+        return sorted(self.postings.get(field, {}))
+
+    def validate(self, filter):
+        """Raise ValueError if ``filter`` is malformed or uses a field that is not indexed."""
+        if not isinstance(filter, dict):
+            raise ValueError("'filter' must be an object mapping field names to values")
+        for field in filter:
+            if field not in self.postings:
+                raise ValueError(f"Cannot filter on '{field}'. Indexed fields: {', '.join(self.postings)}")
+
+    def select(self, filter):
+        """Return the sorted FAISS ids matching ``filter``."""
+        self.validate(filter)
+        ids = None
+        for field, wanted in filter.items():
+            field_postings = self.postings[field]
+            matches = [field_postings[v] for v in _values(wanted) if v in field_postings]
+            field_ids = np.unique(np.concatenate(matches)) if matches else np.empty(0, dtype=np.int64)
+            ids = field_ids if ids is None else np.intersect1d(ids, field_ids, assume_unique=True)
+            if not len(ids):
+                break
+        return ids if ids is not None else np.arange(self.ntotal, dtype=np.int64)
+
+
+def search_params(ids):
+    """FAISS search parameters restricting the search to ``ids``."""
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+    # IDSelectorBatch copies the ids into its own hash set; the SearchParameters
+    # wrapper keeps the selector itself alive
+    selector = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+    return faiss.SearchParameters(sel=selector)
@@ -0,0 +1,140 @@
+import os
+import time
+import difflib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.common.logger import get_logger
+from app.common.cache import LRUCache, normalize_query
+
+logger = get_logger(__name__)
+
+# Fixed ids older clients and the backends' fallbacks send; prefetched hits are per visitor,
+# so sessions under these would be shared by everyone
+SHARED_SESSION_IDS = frozenset({"default", "default_session", "portfolio_chat"})
+
+
+def is_shared_session(session_id):
+    return not session_id or session_id in SHARED_SESSION_IDS
+
+
+def prompt_similarity(a, b):
+    a, b = normalize_query(a), normalize_query(b)
+    if a == b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+class PrefetchEntry:
+    def __init__(self, prompt, index_key, index_version, shards, filter, hits):
+        self.prompt = prompt
+        self.index_key = index_key
+        self.index_version = index_version
+        self.shards = shards
+        self.filter = filter
+        self.hits = hits
+        self.created = time.monotonic()
+
+
+class Prefetcher:
+    """
+    Speculative retrieval for prompts the user is still typing.
+
+    ``submit`` embeds and searches a partial prompt on a small worker pool and
+    keeps the hits per session for ``ttl`` seconds; ``take`` hands them to the
+    final chat request if its prompt is close enough. Cost is capped three ways:
+    a per-session minimum interval between prefetches, a global limit on
+    prefetches in flight (extra ones are refused, not queued), and a bounded
+    number of sessions.
+    """
+
+    def __init__(self, rag, ttl=10.0, min_interval=0.3, max_inflight=4, max_sessions=1000,
+                 min_chars=8, match_threshold=0.85):
+        self.rag = rag
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self.min_chars = min_chars
+        self.match_threshold = match_threshold
+        self._entries = LRUCache(max_sessions)
+        self._last_submit = LRUCache(max_sessions)
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="prefetch")
+        self._counts_lock = threading.Lock()
+        self.counts = {"shared_session": 0, "scheduled": 0, "debounced": 0, "throttled": 0, "too_short": 0, "hits": 0, "misses": 0}
+
+    @classmethod
+    def from_env(cls, rag):
+        return cls(
+            rag,
+            ttl=float(os.getenv("PREFETCH_TTL_SECONDS", "10")),
+            min_interval=float(os.getenv("PREFETCH_MIN_INTERVAL_MS", "300")) / 1000,
+            max_inflight=int(os.getenv("PREFETCH_MAX_INFLIGHT", "4")),
+            max_sessions=int(os.getenv("PREFETCH_MAX_SESSIONS", "1000")),
+            min_chars=int(os.getenv("PREFETCH_MIN_CHARS", "8")),
+            match_threshold=float(os.getenv("PREFETCH_MATCH_THRESHOLD", "0.85")),
+        )
+
+    def _count(self, key):
+        with self._counts_lock:
+            self.counts[key] += 1
+        return key
+
+    def submit(self, session_id, prompt, shards=None, filter=None, index_key=None):
+        """Schedule a speculative search; returns what happened as a status string."""
+        if is_shared_session(session_id):
+            return self._count("shared_session")
+        if len(prompt.strip()) < self.min_chars:
+            return self._count("too_short")
+
+        now = time.monotonic()
+        last = self._last_submit.get(session_id)
+        if last is not None and now - last < self.min_interval:
+            return self._count("debounced")
+        if not self._slots.acquire(blocking=False):
+            return self._count("throttled")
+
+        self._last_submit.put(session_id, now)
+        try:
+            self._executor.submit(self._run, session_id, prompt, shards, filter, index_key)
+        except RuntimeError:
+            self._slots.release()
+            raise
+        return self._count("scheduled")
+
+    def _run(self, session_id, prompt, shards, filter, index_key):
+        try:
+            # A cold named index is loaded here, ahead of the chat request that needs it
+            index = self.rag.resolve_index(index_key)
+            if index is None:
+                return
+            hits = self.rag.search_index(index, prompt, shards=shards, filter=filter)
+            self._entries.put(session_id, PrefetchEntry(prompt, index.key, index.version, shards, filter, hits))
+        except Exception as e:
+            logger.warning(f"Prefetch failed for session {session_id}: {e}")
+        finally:
+            self._slots.release()
+
+    def take(self, session_id, prompt, index, shards=None, filter=None):
+        """Prefetched hits for this session if still fresh, from ``index`` and matching ``prompt``, else None."""
+        if is_shared_session(session_id):
+            return None
+        entry = self._entries.get(session_id)
+        if (
+            entry is None
+            or time.monotonic() - entry.created > self.ttl
+            or entry.index_key != index.key
+            or entry.index_version != index.version
+            or entry.shards != shards
+            or entry.filter != filter
+            or prompt_similarity(entry.prompt, prompt) < self.match_threshold
+        ):
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry.hits
+
+    def stats(self):
+        with self._counts_lock:
+            counts = dict(self.counts)
+        counts["sessions"] = len(self._entries)
+        return counts
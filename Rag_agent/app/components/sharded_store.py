@@ -0,0 +1,209 @@
+import os
+import re
+import heapq
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from app.common.logger import get_logger
+from app.common.custom_exception import CustomException
+from app.common.profiling import submit_profiled
+from app.components.hot_reload import INDEX_FILES, is_index_dir, publish_index
+from app.components.metadata_index import MetadataIndex, search_params
+
+logger = get_logger(__name__)
+
+DEFAULT_SHARD_BY = "type"
+
+
+def shard_name(value):
+    """Turn a metadata value into a safe shard directory name."""
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(value)).strip("_.")
+    return name or "default"
+
+
+def is_sharded(path):
+    """True if ``path`` is a shard root (subdirectories holding FAISS indexes)."""
+    if not os.path.isdir(path) or os.path.exists(os.path.join(path, INDEX_FILES[0])):
+        return False
+    return bool(list_shards(path))
+
+
+def list_shards(path):
+    return sorted(name for name in os.listdir(path) if is_index_dir(path, name))
+
+
+def higher_is_better(store):
+    # langchain builds an IndexFlatIP only for inner product; everything else is L2 distance
+    return store.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT
+
+
+def search_faiss(store, vector, k, ids=None):
+    """
+    Search one langchain FAISS store with a precomputed query vector.
+
+    Returns ``(docstore_id, document, score)`` tuples using the raw FAISS score, so
+    results from stores sharing an embedding model can be merged directly. ``ids``
+    restricts the search to those FAISS ids (see ``MetadataIndex.select``).
+    """
+    query = np.asarray([vector], dtype=np.float32)
+    if store._normalize_L2:
+        faiss.normalize_L2(query)
+    if ids is None:
+        scores, indices = store.index.search(query, k)
+    elif not len(ids):
+        return []
+    else:
+        scores, indices = store.index.search(query, min(k, len(ids)), params=search_params(ids))
+    results = []
+    for score, i in zip(scores[0], indices[0]):
+        if i == -1:
+            continue
+        doc_id = store.index_to_docstore_id[i]
+        doc = store.docstore.search(doc_id)
+        if isinstance(doc, Document):
+            results.append((doc_id, doc, float(score)))
+    return results
+
+
+def build_shards(documents, embeddings, root, shard_by=DEFAULT_SHARD_BY, only=None):
+    """
+    Group ``documents`` by their ``shard_by`` metadata and publish one FAISS index per group.
+
+    ``only`` restricts the build to the named shards, leaving the others on disk
+    untouched, so re-ingesting one source does not rewrite the whole store.
+    """
+    try:
+        groups = defaultdict(list)
+        for doc in documents:
+            value = doc.metadata.get(shard_by, "default")
+            # Deduplicated chunks may carry merged list values; the first is the representative's
+            if isinstance(value, list):
+                value = value[0]
+            groups[shard_name(value)].append(doc)
+
+        built = {}
+        for name, docs in sorted(groups.items()):
+            if only and name not in only:
+                continue
+            logger.info(f"Building shard '{name}' with {len(docs)} chunks...")
+            store = FAISS.from_documents(docs, embeddings)
+            publish_index(store, os.path.join(root, name))
+            built[name] = len(docs)
+        logger.info(f"Built {len(built)} shards under {root}")
+        return built
+    except Exception as e:
+        logger.error(f"Error building shards: {e}")
+        raise CustomException(f"Error building shards: {e}")
+
+
+class ShardedVectorStore:
+    """
+    A set of independently built FAISS indexes searched in parallel.
+
+    The query is embedded once, every selected shard is searched on a thread pool
+    (FAISS releases the GIL during search) and the per-shard top-k lists are
+    merged by score.
+    """
+
+    def __init__(self, shards, embeddings, max_workers=None, metadata_indexes=None):
+        if not shards:
+            raise ValueError("ShardedVectorStore needs at least one shard")
+        self.shards = shards
+        self.embeddings = embeddings
+        self.metadata_indexes = metadata_indexes or {
+            name: MetadataIndex.build(store) for name, store in shards.items()
+        }
+        self._higher_is_better = higher_is_better(next(iter(shards.values())))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(len(shards), os.cpu_count() or 1),
+            thread_name_prefix="shard-search"
+        )
+
+    @classmethod
+    def load(cls, root, embeddings, max_workers=None):
+        shards = {}
+        metadata_indexes = {}
+        for name in list_shards(root):
+            shard_path = os.path.join(root, name)
+            shards[name] = FAISS.load_local(
+                shard_path,
+                embeddings,
+                allow_dangerous_deserialization=True
+            )
+            metadata_indexes[name] = MetadataIndex.load_or_build(shards[name], shard_path)
+        logger.info(f"Loaded {len(shards)} shards from {root}: {', '.join(shards)}")
+        return cls(shards, embeddings, max_workers=max_workers, metadata_indexes=metadata_indexes)
+
+    @property
+    def shard_names(self):
+        return list(self.shards)
+
+    def _select(self, shards):
+        if not shards:
+            return list(self.shards)
+        unknown = [name for name in shards if name not in self.shards]
+        if unknown:
+            raise ValueError(f"Unknown shard(s): {', '.join(unknown)}. Available: {', '.join(self.shards)}")
+        return list(shards)
+
+    def validate(self, shards=None, filter=None):
+        """Raise ValueError for unknown shards or filter fields, before any search runs."""
+        for name in self._select(shards):
+            if filter:
+                self.metadata_indexes[name].validate(filter)
+
+    def search_by_vector(self, vector, k=4, shards=None, filter=None):
+        """Return the merged top-k ``(docstore_id, document, score)`` across shards."""
+        jobs = []
+        for name in self._select(shards):
+            ids = self.metadata_indexes[name].select(filter) if filter else None
+            if ids is None or len(ids):
+                jobs.append((self.shards[name], ids))
+
+        if len(jobs) <= 1:
+            results = [hit for store, ids in jobs for hit in search_faiss(store, vector, k, ids)]
+        else:
+            futures = [submit_profiled(self._executor, search_faiss, store, vector, k, ids) for store, ids in jobs]
+            results = [hit for future in futures for hit in future.result()]
+        pick = heapq.nlargest if self._higher_is_better else heapq.nsmallest
+        return pick(k, results, key=lambda hit: hit[2])
+
+    def similarity_search_with_score(self, query, k=4, shards=None, filter=None):
+        vector = self.embeddings.embed_query(query)
+        return [(doc, score) for _, doc, score in self.search_by_vector(vector, k, shards, filter)]
+
+    def similarity_search(self, query, k=4, shards=None, filter=None):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, shards, filter)]
+
+    def as_retriever(self, search_kwargs=None):
+        search_kwargs = search_kwargs or {}
+        return ShardedRetriever(store=self, k=search_kwargs.get("k", 4), shards=search_kwargs.get("shards"))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ShardedRetriever(BaseRetriever):
+    """langchain retriever over a ``ShardedVectorStore``."""
+
+    store: Any
+    k: int = 4
+    shards: Optional[List[str]] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.store.similarity_search(query, k=self.k, shards=self.shards)
@@ -22,6 +22,7 @@ if project_root not in sys.path:
 
 from app.common.logger import get_logger
 from app.common.custom_exception import CustomException
+from app.components.hot_reload import publish_index
 
 logger = get_logger(__name__)
 
@@ -64,7 +65,7 @@ def save_db_faiss(text_chunks):
         logger.info("Saving FAISS database...")
         embedding_model = huggingface_embedding()
         db=FAISS.from_documents(text_chunks,embedding_model)
-        db.save_local(DB_FAISS_PATH)
+        publish_index(db, DB_FAISS_PATH)
         logger.info("FAISS database saved successfully.")
         return db
     except Exception as e:
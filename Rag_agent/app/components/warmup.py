@@ -0,0 +1,126 @@
+import os
+import json
+import time
+from collections import Counter
+
+from app.common.logger import get_logger
+from app.common.cache import normalize_query
+from app.common.tracing import read_traces, trace_recorder
+
+logger = get_logger(__name__)
+
+# Mirrors the starter topics the chat widgets advertise ("projects, skills, experience, or achievements")
+DEFAULT_WARMUP_QUERIES = [
+    "What are Aakash's skills?",
+    "Tell me about Aakash's projects",
+    "What is Aakash's work experience?",
+    "What are Aakash's achievements?",
+    "What is Aakash's education?",
+    "How can I contact Aakash?",
+]
+
+
+def load_warmup_queries(path=None):
+    """Queries from ``path`` (one per line, # comments allowed), else the defaults."""
+    path = path or os.getenv("WARMUP_QUERIES_FILE")
+    if not path or not os.path.exists(path):
+        return list(DEFAULT_WARMUP_QUERIES)
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def top_traffic_queries(n, trace_paths=None):
+    """The ``n`` most frequent prompts in the captured traces (needs TRACE_PROMPTS=text)."""
+    if n <= 0:
+        return []
+    if trace_paths is None:
+        base = trace_recorder.path
+        trace_paths = [f"{base}.1", base]
+    trace_paths = [p for p in trace_paths if os.path.exists(p)]
+
+    counts = Counter()
+    first_seen = {}
+    for record in read_traces(trace_paths):
+        prompt = record.get("prompt")
+        if not prompt or record.get("status", 200) != 200 or record.get("shards") or record.get("filter"):
+            continue
+        # Warm-up runs against the default index; traffic for named indexes would only pollute it
+        if record.get("index"):
+            continue
+        key = normalize_query(prompt)
+        counts[key] += 1
+        first_seen.setdefault(key, prompt)
+    return [first_seen[key] for key, _ in counts.most_common(n)]
+
+
+def load_warm_answers(path, index_version):
+    """Persisted answers for ``index_version``; answers for any other index are ignored."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Ignoring unreadable warm answers file {path}: {e}")
+        return {}
+    if data.get("index_version") != index_version:
+        return {}
+    return data.get("answers", {})
+
+
+def save_warm_answers(path, index_version, answers):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"index_version": index_version, "answers": answers}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def warm_up(rag, queries, run_llm=False, answers_path=None):
+    """
+    Pre-run ``queries`` so the first real visitors hit warm caches.
+
+    Answers persisted by a previous boot for the same index version are loaded
+    straight into the answer cache. Every query is then embedded and searched
+    (filling the embedding cache and paging in the index); with ``run_llm`` the
+    remaining ones also go through the LLM. Cached answers for the warm-up
+    queries are written back to ``answers_path``.
+    """
+    index = rag.index
+    if index is None or not queries:
+        return {}
+    start = time.perf_counter()
+
+    persisted = load_warm_answers(answers_path, index.version) if answers_path else {}
+    for question, answer in persisted.items():
+        rag.answer_cache.put(index.cache_key(question), answer)
+
+    generated = 0
+    for question in queries:
+        try:
+            rag.search(question)
+            if run_llm and rag.answer_cache.get(index.cache_key(question)) is None:
+                if not rag.answer(question).error:
+                    generated += 1
+        except Exception as e:
+            logger.warning(f"Warm-up query failed: {question!r}: {e}")
+
+    answers = {}
+    for question in queries:
+        answer = rag.answer_cache.get(index.cache_key(question))
+        if answer is not None:
+            answers[question] = answer
+    if answers_path and answers:
+        try:
+            save_warm_answers(answers_path, index.version, answers)
+        except OSError as e:
+            logger.warning(f"Could not persist warm answers to {answers_path}: {e}")
+
+    stats = {
+        "queries": len(queries),
+        "answers_loaded": len(persisted),
+        "answers_generated": generated,
+        "answers_warm": len(answers),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    logger.info(f"Warm-up finished: {stats}")
+    return stats
@@ -0,0 +1,85 @@
+"""
+Filtered vs post-filtered FAISS search latency.
+
+Builds a synthetic store with ``type`` metadata spread over ``--types`` values and
+compares, for a filter matching one type:
+
+- selector:    MetadataIndex ids passed to FAISS as an IDSelector
+- postfilter:  fetch ``k * --overfetch`` neighbours, then drop non-matching ones
+                (what callers had to do before; may return fewer than k hits)
+
+Usage (from Rag_agent/):
+    python benchmarks/bench_filtered_search.py --n 50000 --types 20
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+
+from app.components.metadata_index import MetadataIndex
+from app.components.sharded_store import search_faiss
+
+
+def build_store(n, dim, types, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    texts = [f"chunk {i}" for i in range(n)]
+    metadatas = [{"type": f"type_{i % types}", "source": f"doc_{i % 97}"} for i in range(n)]
+    store = FAISS.from_embeddings(list(zip(texts, vectors)), FakeEmbeddings(size=dim), metadatas=metadatas)
+    return store, rng
+
+
+def timed(fn, queries):
+    latencies = []
+    returned = []
+    for q in queries:
+        start = time.perf_counter()
+        hits = fn(q)
+        latencies.append((time.perf_counter() - start) * 1000)
+        returned.append(len(hits))
+    return np.asarray(latencies), np.asarray(returned)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=50000, help="number of vectors")
+    parser.add_argument("--dim", type=int, default=384, help="vector dimension (all-MiniLM-L6-v2 is 384)")
+    parser.add_argument("--types", type=int, default=20, help="distinct 'type' values; selectivity is 1/types")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--overfetch", type=int, default=10, help="post-filter fetches k * overfetch")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    store, rng = build_store(args.n, args.dim, args.types)
+    metadata_index = MetadataIndex.build(store)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    wanted = {"type": "type_0"}
+
+    def selector(q):
+        return search_faiss(store, q, args.k, metadata_index.select(wanted))
+
+    def postfilter(q):
+        hits = search_faiss(store, q, args.k * args.overfetch)
+        return [hit for hit in hits if hit[1].metadata.get("type") == wanted["type"]][:args.k]
+
+    print(f"n={args.n} dim={args.dim} selectivity=1/{args.types} k={args.k} queries={args.queries}")
+    print(f"{'method':<12}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}{'short results':>16}")
+    for name, fn in (("selector", selector), ("postfilter", postfilter)):
+        fn(queries[0])  # warm up
+        latencies, returned = timed(fn, queries)
+        short = int((returned < args.k).sum())
+        print(
+            f"{name:<12}{np.percentile(latencies, 50):>10.3f}{np.percentile(latencies, 95):>10.3f}"
+            f"{latencies.mean():>10.3f}{short:>16}"
+        )
+
+
+if __name__ == "__main__":
+    main()
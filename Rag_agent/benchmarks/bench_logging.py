@@ -0,0 +1,126 @@
+"""
+Per-call logging overhead: synchronous FileHandler vs the queue-based JSON pipeline.
+
+Each of --threads threads logs --messages lines as fast as it can, the way
+request handlers do under load. Reported latencies are what the calling thread
+pays per logger.info(); the pipeline's disk writes happen on its writer thread.
+--write-latency-ms adds a fixed delay to every write() call to model slow or
+network-backed disks, where a synchronous handler stalls the request thread.
+
+Usage (from Rag_agent/):
+    python benchmarks/bench_logging.py --threads 16 --messages 20000
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.common.logger import BatchingFileWriter, QueueJSONHandler, format_log_timestamp
+
+
+def run(logger, threads, messages):
+    latencies = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads)
+
+    def worker(slot):
+        barrier.wait()
+        out = latencies[slot]
+        for i in range(messages):
+            start = time.perf_counter_ns()
+            logger.info(f"chat request {i} answered in {i % 900} ms for session s{slot}")
+            out.append(time.perf_counter_ns() - start)
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    flat = sorted(ns for slot in latencies for ns in slot)
+    return elapsed, flat
+
+
+def pct(values, p):
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] / 1000
+
+
+def report(name, elapsed, flat, extra=""):
+    total = len(flat)
+    print(
+        f"{name:<10}{total / elapsed:>14,.0f}{pct(flat, 50):>10.1f}{pct(flat, 99):>10.1f}"
+        f"{pct(flat, 99.9):>11.1f}  {extra}"
+    )
+
+
+class SlowFileHandler(logging.FileHandler):
+    def __init__(self, path, delay):
+        super().__init__(path)
+        self.delay = delay
+
+    def emit(self, record):
+        if self.delay:
+            time.sleep(self.delay)
+        super().emit(record)
+
+
+class SlowBatchingFileWriter(BatchingFileWriter):
+    def __init__(self, path, delay, **kwargs):
+        self.delay = delay
+        super().__init__(path, **kwargs)
+
+    def _write(self, entries):
+        if self.delay:
+            time.sleep(self.delay)
+        super()._write(entries)
+
+
+def isolated_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--messages", type=int, default=20000, help="messages per thread")
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--write-latency-ms", type=float, default=0.0, help="simulated latency per write() call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        delay = args.write_latency_ms / 1000
+        print(f"threads={args.threads} messages/thread={args.messages} write latency={args.write_latency_ms}ms")
+        print(f"{'handler':<10}{'calls/s':>14}{'p50 us':>10}{'p99 us':>10}{'p99.9 us':>11}")
+
+        sync_handler = SlowFileHandler(os.path.join(tmp, "sync.log"), delay)
+        sync_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        elapsed, flat = run(isolated_logger("bench.sync", sync_handler), args.threads, args.messages)
+        sync_handler.close()
+        report("sync", elapsed, flat)
+
+        writer = SlowBatchingFileWriter(
+            os.path.join(tmp, "queued.log"), delay, queue_size=args.queue_size, name="bench-writer",
+            prepare=format_log_timestamp
+        )
+        elapsed, flat = run(isolated_logger("bench.queued", QueueJSONHandler(writer)), args.threads, args.messages)
+        drain_start = time.perf_counter()
+        writer.close(timeout=60)
+        stats = writer.stats()
+        report(
+            "queued", elapsed, flat,
+            f"written={stats['written']} dropped={stats['dropped']} batches={stats['batches']} "
+            f"drain={time.perf_counter() - drain_start:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
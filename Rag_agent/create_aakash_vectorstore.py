@@ -1,14 +1,19 @@
 import os
+import argparse
 from dotenv import load_dotenv
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+from app.components.hot_reload import publish_index
+from app.components.sharded_store import build_shards
+from app.components.dedup import dedup_documents
+
 # Load environment variables
 load_dotenv()
 
-def create_aakash_vectorstore():
+def create_aakash_vectorstore(shard_by=None, only_shards=None, dedup=True):
     try:
         print("🔄 Creating Aakash's personal knowledge base...")
         
@@ -51,6 +56,19 @@ def create_aakash_vectorstore():
         split_docs = text_splitter.split_documents(processed_docs)
         print(f"✅ Split into {len(split_docs)} chunks")
         
+        # Collapse near-duplicate chunks (skills/project blurbs repeated across pages)
+        if dedup:
+            split_docs, report = dedup_documents(split_docs)
+            print(f"✅ Deduplicated: {report.summary()}")
+        
+        if shard_by:
+            # One independently saved index per metadata value; only the named shards are rebuilt
+            shards_path = "vectorstore/shards"
+            built = build_shards(split_docs, embeddings, shards_path, shard_by=shard_by, only=only_shards)
+            for name, count in built.items():
+                print(f"✅ Shard '{name}' saved to {shards_path}/{name} ({count} chunks)")
+            return bool(built)
+
         # Create vector store
         vectorstore = FAISS.from_documents(split_docs, embeddings)
         print("✅ Vector store created")
@@ -58,11 +76,9 @@ def create_aakash_vectorstore():
         # Save vector store
         vectorstore_path = "vectorstore/db_faiss"
         
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(vectorstore_path), exist_ok=True)
-        
-        vectorstore.save_local(vectorstore_path)
-        print(f"✅ Vector store saved to {vectorstore_path}")
+        # Publish atomically with a VERSION file so running servers can hot-swap it
+        version = publish_index(vectorstore, vectorstore_path)
+        print(f"✅ Vector store saved to {vectorstore_path} (version {version})")
         
         # Test the vector store
         test_query = "What are Aakash's skills?"
@@ -77,7 +93,15 @@ def create_aakash_vectorstore():
         return False
 
 if __name__ == "__main__":
-    success = create_aakash_vectorstore()
+    parser = argparse.ArgumentParser(description="Build Aakash's FAISS knowledge base")
+    parser.add_argument("--shard-by", choices=["source", "type"], help="Build one index per value of this metadata field under vectorstore/shards")
+    parser.add_argument("--shard", action="append", dest="shards", help="Only rebuild this shard (repeatable, requires --shard-by)")
+    parser.add_argument("--no-dedup", action="store_true", help="Keep near-duplicate chunks")
+    args = parser.parse_args()
+    if args.shards and not args.shard_by:
+        parser.error("--shard requires --shard-by")
+
+    success = create_aakash_vectorstore(shard_by=args.shard_by, only_shards=args.shards, dedup=not args.no_dedup)
     if success:
         print("\n🎉 Aakash's personal knowledge base created successfully!")
         print("💡 The RAG agent can now answer questions about Aakash's experience, projects, and skills.")
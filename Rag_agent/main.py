@@ -1,16 +1,29 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query, Response
+from fastapi.responses import PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import os
+import hmac
+import time
+import tracemalloc
 from dotenv import load_dotenv
 import uvicorn
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
-from simplified_rag import Retriver, VectorStore, LLMModel
+from simplified_rag import MAX_SEARCH_K, Retriver, VectorStore, LLMModel
 from app.config.config_class import Config
+from app.common.tracing import trace_recorder
+from app.common.profiling import ProfileStore, memory_report, profile_requested
+from app.common.deadline import Deadline, deadline_stats
+from app.common.logger import logging_stats
+from app.components.prefetch import is_shared_session
 
 load_dotenv()
 
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+profile_store = ProfileStore.from_env()
+
 app = FastAPI(
     title="Aakash Portfolio Chatbot API",
     description="A FastAPI backend for RAG-based portfolio chatbot",
@@ -28,11 +41,38 @@ app.add_middleware(
 class ChatRequest(BaseModel):
     prompt: str
     session_id: Optional[str] = None
+    index: Optional[str] = None
+    shards: Optional[List[str]] = None
+    filter: Optional[Dict[str, Any]] = None
 
 class ChatResponse(BaseModel):
     answer: str
     session_id: str
     sources: list = []
+    degraded: bool = False
+
+class PrefetchRequest(BaseModel):
+    prompt: str
+    session_id: str
+    index: Optional[str] = None
+    shards: Optional[List[str]] = None
+    filter: Optional[Dict[str, Any]] = None
+
+class SearchRequest(BaseModel):
+    query: str
+    k: int = Field(3, ge=1, le=MAX_SEARCH_K)
+    index: Optional[str] = None
+    shards: Optional[List[str]] = None
+    filter: Optional[Dict[str, Any]] = None
+
+class SearchResult(BaseModel):
+    id: str
+    content: str
+    metadata: dict
+    score: float
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
 
 class HealthResponse(BaseModel):
     status: str
@@ -71,40 +111,172 @@ async def health_check():
     )
 
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(
+    request: ChatRequest,
+    response: Response,
+    profile: Optional[str] = None,
+    x_debug_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+    x_request_timeout_ms: Optional[str] = Header(None)
+):
     if retriever is None:
         raise HTTPException(
             status_code=503, 
             detail="RAG system not initialized. Please check your configuration."
         )
     
+    # Profiling is opt-in per request and admin-only
+    profiling = profile_requested(x_debug_profile or profile)
+    if profiling:
+        require_admin(x_admin_token)
+
     try:
-        # Get response from RAG system
-        answer = retriever.get_response(request.prompt)
-        
-        # Generate or use provided session ID
-        session_id = request.session_id or "default_session"
+        deadline = Deadline.from_header(x_request_timeout_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Generate or use provided session ID
+    session_id = request.session_id or "default_session"
+    started_at = time.time()
+    trace = dict(session_id=session_id, shards=request.shards, filter=request.filter, index=request.index)
+
+    try:
+        # Get response from RAG system on a worker thread so the event loop stays free
+        rag_kwargs = dict(
+            shards=request.shards, filter=request.filter, deadline=deadline, session_id=request.session_id,
+            index_key=request.index
+        )
+        if profiling:
+            result, profile_id = await run_in_threadpool(
+                profile_store.profile, retriever.answer, request.prompt, **rag_kwargs
+            )
+            response.headers["X-Profile-Id"] = profile_id
+        else:
+            result = await run_in_threadpool(retriever.answer, request.prompt, **rag_kwargs)
+        trace_recorder.record("fastapi", request.prompt, started_at, result=result,
+                              response_bytes=len(result.answer.encode("utf-8")), **trace)
         
         return ChatResponse(
-            answer=answer,
+            answer=result.answer,
             session_id=session_id,
-            sources=[]  # You can extend this to return source documents
+            sources=[],  # You can extend this to return source documents
+            degraded=result.degraded
         )
         
+    except ValueError as e:
+        trace_recorder.record("fastapi", request.prompt, started_at, status=400, **trace)
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        trace_recorder.record("fastapi", request.prompt, started_at, status=500, **trace)
         raise HTTPException(
             status_code=500,
             detail=f"Error processing request: {str(e)}"
         )
 
+@app.post("/api/prefetch", status_code=202)
+async def prefetch(request: PrefetchRequest):
+    """Speculatively retrieve for a prompt the user is still typing; /api/chat reuses the result"""
+    if is_shared_session(request.session_id):
+        raise HTTPException(status_code=400, detail="'session_id' must be unique per visitor")
+    if retriever is None:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+
+    # Only schedules work on the prefetch pool, so it is safe to call on the event loop
+    status = retriever.prefetch(
+        request.session_id, request.prompt, shards=request.shards, filter=request.filter, index_key=request.index
+    )
+    return {"status": status, "session_id": request.session_id}
+
+@app.post("/api/search", response_model=SearchResponse)
+async def search(request: SearchRequest):
+    if retriever is None:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+
+    try:
+        # May load a cold named index, so keep it off the event loop
+        hits = await run_in_threadpool(
+            retriever.search, request.query, k=request.k, shards=request.shards, filter=request.filter,
+            index_key=request.index
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching: {str(e)}")
+
+    return SearchResponse(results=[
+        SearchResult(id=doc_id, content=doc.page_content, metadata=doc.metadata, score=score)
+        for doc_id, doc, score in hits
+    ])
+
 @app.get("/api/status")
 async def get_status():
-    return {
+    status = {
         "api_status": "running",
         "rag_initialized": retriever is not None and hasattr(retriever, 'rag') and retriever.rag is not None,
         "model_loaded": retriever is not None and hasattr(retriever, 'rag') and hasattr(retriever.rag, 'llm') and retriever.rag.llm is not None,
         "vector_store_loaded": retriever is not None and hasattr(retriever, 'rag') and hasattr(retriever.rag, 'vector_store') and retriever.rag.vector_store is not None
     }
+    if retriever is not None:
+        status.update(retriever.index_status())
+    status["deadline_exceeded"] = deadline_stats.snapshot()
+    status["logging"] = logging_stats()
+    return status
+
+def require_admin(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled. Set ADMIN_TOKEN to enable them.")
+    # Constant-time compare; bytes so non-ASCII or missing tokens can't raise
+    if not hmac.compare_digest((token or "").encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.post("/api/admin/reload", status_code=202)
+async def reload_index(index: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    if retriever is None:
+        raise HTTPException(status_code=503, detail="RAG components not initialized")
+
+    # Named indexes are reloaded lazily: drop the resident copy and the next request loads it from disk
+    if index:
+        unloaded = retriever.unload_index(index)
+        return {
+            "index": index,
+            "unloaded": unloaded,
+            "message": "Index will be reloaded on next use" if unloaded else "Index was not loaded",
+        }
+
+    try:
+        started = retriever.reload_vector_store(background=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting index reload: {str(e)}")
+
+    return {
+        "reload_started": started,
+        "message": "Reload started; poll /api/status for the active index version" if started else "A reload is already in progress",
+        **retriever.index_status()
+    }
+
+@app.get("/debug/memory")
+async def debug_memory(
+    top: int = 15,
+    tracemalloc_action: Optional[str] = Query(None, alias="tracemalloc"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Process RSS, tracemalloc top allocators (start with ?tracemalloc=start) and RAG component sizes"""
+    require_admin(x_admin_token)
+    if tracemalloc_action == "start" and not tracemalloc.is_tracing():
+        tracemalloc.start(int(os.getenv("TRACEMALLOC_FRAMES", "1")))
+    elif tracemalloc_action == "stop" and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return memory_report(retriever.rag if retriever is not None else None, top=top)
+
+@app.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+async def debug_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Folded stacks of a profiled request, ready for flamegraph.pl or speedscope"""
+    require_admin(x_admin_token)
+    folded = profile_store.load(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return folded
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
@@ -1,5 +1,12 @@
 import os
 import sys
+import gc
+import time
+import threading
+import textwrap
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from datetime import datetime
 from dotenv import load_dotenv
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
@@ -7,118 +14,521 @@ from langchain_groq import ChatGroq
 from langchain.chains import RetrievalQA
 from langchain_core.prompts import PromptTemplate
 
+from app.components.hot_reload import IndexWatcher, index_version
+from app.components.sharded_store import ShardedVectorStore, is_sharded, search_faiss
+from app.components.metadata_index import INDEXED_FIELDS, MetadataIndex
+from app.components.warmup import load_warmup_queries, top_traffic_queries, warm_up
+from app.components.prefetch import Prefetcher
+from app.components.index_registry import IndexRegistry
+from app.common.cache import LRUCache, normalize_query
+from app.common.deadline import DEFAULT_TIMEOUT_SECONDS, DeadlineExceeded
+from app.common.profiling import submit_profiled
+from app.common.logger import get_logger
+
 # Load environment variables
 load_dotenv()
 
+logger = get_logger(__name__)
+
+DEFAULT_VECTORSTORE_PATH = os.path.join(os.path.dirname(__file__), "vectorstore", "db_faiss")
+SMOKE_QUERY = "What are Aakash's skills?"
+RETRIEVAL_K = 3
+# Upper bound on client-supplied k; FAISS allocates k-sized result arrays per query
+MAX_SEARCH_K = int(os.getenv("MAX_SEARCH_K", "50"))
+# A call the request stopped waiting for keeps its llm-call worker busy until the client
+# gives up, which takes (retries + 1) attempts of up to LLM_TIMEOUT_SECONDS each. Retries are
+# off by default and the per-attempt timeout is capped so all attempts fit the default
+# request budget.
+LLM_MAX_RETRIES = max(0, int(os.getenv("LLM_MAX_RETRIES", "0")))
+LLM_TIMEOUT_SECONDS = min(
+    float(os.getenv("LLM_TIMEOUT_SECONDS", str(DEFAULT_TIMEOUT_SECONDS))),
+    DEFAULT_TIMEOUT_SECONDS / (LLM_MAX_RETRIES + 1)
+)
+# Below this much remaining budget the LLM call is skipped and snippets are returned instead
+LLM_MIN_BUDGET_SECONDS = float(os.getenv("LLM_MIN_BUDGET_SECONDS", "1.0"))
+
+# Create custom prompt for Aakash's personal assistant
+CUSTOM_PROMPT = """You are Aakash's personal AI assistant. You have comprehensive knowledge about Sai Aakash - his experience, projects, skills, education, and achievements.
+
+Your role:
+- Answer questions about Aakash's professional background, projects, skills, education, work experience, and achievements
+- Provide detailed information about his AI/ML projects, especially RAG agents, LLMOps, and Agentic AI work
+- Share his contact information and links when relevant
+- Highlight his expertise in Python, AI/ML, LangChain, RAG systems, and MLOps
+
+Important guidelines:
+- ONLY answer questions about Aakash/Sai Aakash
+- If asked about other people or unrelated topics, politely redirect: "I can only provide information about Aakash. Please ask me about his projects, skills, experience, or achievements."
+- Be enthusiastic and professional when describing his work
+- Always base your answers on the provided context
+
+Context: {context}
+Question: {question}
+
+Answer:"""
+
+
+class LoadedIndex:
+    """Everything tied to one loaded FAISS index, swapped as a single reference."""
+
+    def __init__(self, vector_store, qa_chain, path, version, load_seconds, metadata_index=None, key=None):
+        self.vector_store = vector_store
+        self.qa_chain = qa_chain
+        self.metadata_index = metadata_index
+        self.path = path
+        self.version = version
+        self.key = key
+        self.loaded_at = datetime.now()
+        self.load_seconds = load_seconds
+
+    def cache_key(self, question):
+        """Answer cache key; answers never leak across indexes or index versions."""
+        return (self.key, self.version, normalize_query(question))
+
+
 class SimpleRAG:
-    def __init__(self):
+    def __init__(self, vectorstore_path=None):
+        self.vectorstore_path = vectorstore_path or os.getenv("VECTORSTORE_PATH", DEFAULT_VECTORSTORE_PATH)
         self.embeddings = None
-        self.vector_store = None
         self.llm = None
-        self.qa_chain = None
+        self.index = None
+        self.watcher = None
+        self.last_reload_error = None
+        self._reload_lock = threading.Lock()
+        self.embedding_cache = LRUCache(int(os.getenv("EMBEDDING_CACHE_SIZE", "1024")))
+        self.answer_cache = LRUCache(int(os.getenv("ANSWER_CACHE_SIZE", "256")))
+        self.warmup_stats = None
+        self._warmup_lock = threading.Lock()
+        self.prefetcher = None
+        # Named indexes served next to the default one, sharing embeddings and LLM
+        self.registry = IndexRegistry.from_env(self._load_spec)
+        if os.getenv("PREFETCH_ENABLED", "true").lower() in ("1", "true", "yes"):
+            self.prefetcher = Prefetcher.from_env(self)
+        self._llm_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("LLM_MAX_WORKERS", "8")),
+            thread_name_prefix="llm-call"
+        )
         self.setup()
-    
+
+    @property
+    def vector_store(self):
+        index = self.index
+        return index.vector_store if index else None
+
+    @property
+    def qa_chain(self):
+        index = self.index
+        return index.qa_chain if index else None
+
     def setup(self):
         try:
             # Initialize embeddings
             self.embeddings = HuggingFaceEmbeddings(
                 model_name="sentence-transformers/all-MiniLM-L6-v2"
             )
-            
-            # Load vector store if exists
-            vectorstore_path = os.path.join(os.path.dirname(__file__), "vectorstore", "db_faiss")
-            if os.path.exists(vectorstore_path):
-                self.vector_store = FAISS.load_local(
-                    vectorstore_path, 
-                    self.embeddings,
-                    allow_dangerous_deserialization=True
-                )
-                print("✅ Vector store loaded successfully")
-            else:
-                print("❌ Vector store not found. Please create it first.")
-                return
-            
+
             # Initialize LLM - try Gemini first, then Groq
             gemini_api_key = os.getenv("GEMINI_API_KEY")
             groq_api_key = os.getenv("GROQ_API_KEY")
-            
+
             if gemini_api_key and gemini_api_key != "your_gemini_api_key_here":
                 from langchain_google_genai import ChatGoogleGenerativeAI
                 self.llm = ChatGoogleGenerativeAI(
                     model="gemini-1.5-flash",
                     google_api_key=gemini_api_key,
-                    temperature=0.7
+                    temperature=0.7,
+                    timeout=LLM_TIMEOUT_SECONDS,
+                    max_retries=LLM_MAX_RETRIES
                 )
-                print("✅ Gemini LLM initialized successfully")
+                logger.info("Gemini LLM initialized successfully")
             elif groq_api_key and groq_api_key != "your_groq_api_key_here":
                 self.llm = ChatGroq(
                     api_key=groq_api_key,
                     model="llama-3.1-70b-versatile",
-                    temperature=0.7
+                    temperature=0.7,
+                    timeout=LLM_TIMEOUT_SECONDS,
+                    max_retries=LLM_MAX_RETRIES
                 )
-                print("✅ Groq LLM initialized successfully")
+                logger.info("Groq LLM initialized successfully")
             else:
-                print("❌ No valid API key found for LLM")
+                logger.error("No valid API key found for LLM")
                 return
-            
-            # Create custom prompt for Aakash's personal assistant
-            custom_prompt = """You are Aakash's personal AI assistant. You have comprehensive knowledge about Sai Aakash - his experience, projects, skills, education, and achievements.
 
-Your role:
-- Answer questions about Aakash's professional background, projects, skills, education, work experience, and achievements
-- Provide detailed information about his AI/ML projects, especially RAG agents, LLMOps, and Agentic AI work
-- Share his contact information and links when relevant
-- Highlight his expertise in Python, AI/ML, LangChain, RAG systems, and MLOps
+            # Load vector store if exists
+            if not os.path.exists(self.vectorstore_path):
+                if self.registry.keys():
+                    logger.warning(f"Default vector store not found; serving named indexes only: {self.registry.keys()}")
+                else:
+                    logger.error("Vector store not found. Please create it first.")
+                return
 
-Important guidelines:
-- ONLY answer questions about Aakash/Sai Aakash
-- If asked about other people or unrelated topics, politely redirect: "I can only provide information about Aakash. Please ask me about his projects, skills, experience, or achievements."
-- Be enthusiastic and professional when describing his work
-- Always base your answers on the provided context
+            self.index = self._load_index(self.vectorstore_path)
+            logger.info(f"Vector store loaded successfully (version {self.index.version})")
 
-Context: {context}
-Question: {question}
+            watch_interval = float(os.getenv("INDEX_WATCH_INTERVAL", "0"))
+            if watch_interval > 0:
+                self.start_watcher(watch_interval)
 
-Answer:"""
-            
-            # Create QA chain
-            self.qa_chain = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                chain_type="stuff",
-                retriever=self.vector_store.as_retriever(search_kwargs={"k": 3}),
-                return_source_documents=True,
-                chain_type_kwargs={
-                    "prompt": PromptTemplate.from_template(custom_prompt)
-                }
+            if os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes"):
+                self.warm_up_in_background()
+
+        except Exception as e:
+            logger.error(f"Error setting up RAG: {e}")
+            raise
+
+    def _build_qa_chain(self, vector_store, prompt=None):
+        return RetrievalQA.from_chain_type(
+            llm=self.llm,
+            chain_type="stuff",
+            retriever=vector_store.as_retriever(search_kwargs={"k": RETRIEVAL_K}),
+            return_source_documents=True,
+            chain_type_kwargs={
+                "prompt": PromptTemplate.from_template(prompt or CUSTOM_PROMPT)
+            }
+        )
+
+    def _load_index(self, path, prompt=None, key=None):
+        """Load and validate the index at ``path`` without touching the active one."""
+        start = time.perf_counter()
+        version = index_version(path)
+        metadata_index = None
+        if is_sharded(path):
+            vector_store = ShardedVectorStore.load(path, self.embeddings)
+        else:
+            vector_store = FAISS.load_local(
+                path,
+                self.embeddings,
+                allow_dangerous_deserialization=True
             )
-            print("✅ QA chain created successfully")
-            
+            metadata_index = MetadataIndex.load_or_build(vector_store, path)
+
+        # Smoke query: a truncated or half-written index must never go live
+        if not vector_store.similarity_search(SMOKE_QUERY, k=1):
+            raise ValueError(f"Smoke query returned no results for index at {path}")
+
+        qa_chain = self._build_qa_chain(vector_store, prompt)
+        return LoadedIndex(vector_store, qa_chain, path, version, time.perf_counter() - start, metadata_index, key)
+
+    def _load_spec(self, spec):
+        if self.llm is None:
+            raise RuntimeError("RAG system not initialized properly; cannot load index")
+        return self._load_index(spec.path, prompt=spec.load_prompt(), key=spec.key)
+
+    def resolve_index(self, index_key=None):
+        """The default index, or the named one from the registry (loaded on first use)."""
+        if not index_key:
+            return self.index
+        return self.registry.get(index_key)
+
+    def reload_vector_store(self):
+        """
+        Load the index from disk and swap it in atomically.
+
+        Requests already holding the previous ``LoadedIndex`` finish on it; the old
+        index is freed once the last of them drops its reference. Returns False if
+        another reload is already running.
+        """
+        if self.llm is None:
+            raise RuntimeError("RAG system not initialized properly; cannot reload index")
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            new_index = self._load_index(self.vectorstore_path)
+            old_index, self.index = self.index, new_index
+            self.last_reload_error = None
+            logger.info(
+                f"Vector store hot-swapped: {old_index.version if old_index else None} "
+                f"-> {new_index.version} in {new_index.load_seconds:.2f}s"
+            )
+            del old_index
+            gc.collect()
         except Exception as e:
-            print(f"❌ Error setting up RAG: {e}")
+            self.last_reload_error = str(e)
+            logger.error(f"Error reloading vector store, keeping current index: {e}")
             raise
-    
-    def get_response(self, question: str) -> str:
-        if not self.qa_chain:
-            return "RAG system not initialized properly. Please check your configuration."
-        
+        finally:
+            self._reload_lock.release()
+
+        # Persisted answers are per index version; re-warm for the new one
+        if os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes"):
+            self.warm_up_in_background()
+        return True
+
+    def reload_in_background(self):
+        """Start a reload on a background thread. Returns False if one is already running."""
+        if self._reload_lock.locked():
+            return False
+
+        def _run():
+            try:
+                self.reload_vector_store()
+            except Exception:
+                pass  # recorded in last_reload_error
+
+        threading.Thread(target=_run, name="index-reload", daemon=True).start()
+        return True
+
+    def warm_up_in_background(self):
+        """Start ``warm_up`` on a background thread; the index already serves while it runs."""
+        threading.Thread(target=self.warm_up, name="warm-up", daemon=True).start()
+
+    def warm_up(self):
+        """Run the configured and most frequent recent queries to fill the caches."""
+        # Back-to-back reloads queue their warm-ups; each one warms whichever index is live when it starts
+        with self._warmup_lock:
+            try:
+                self._warm_up()
+            except Exception as e:
+                # A failed warm-up only costs latency; never block serving on it
+                logger.warning(f"Warm-up failed: {e}")
+
+    def _warm_up(self):
+        queries = load_warmup_queries()
+        seen = {normalize_query(q) for q in queries}
+        for question in top_traffic_queries(int(os.getenv("WARMUP_TOP_TRAFFIC", "20"))):
+            if normalize_query(question) not in seen:
+                queries.append(question)
+                seen.add(normalize_query(question))
+
+        answers_path = os.getenv(
+            "WARMUP_ANSWERS_PATH",
+            os.path.join(os.path.dirname(os.path.abspath(self.vectorstore_path)), "warm_answers.json")
+        )
+        run_llm = os.getenv("WARMUP_LLM", "false").lower() in ("1", "true", "yes")
+        self.warmup_stats = warm_up(self, queries, run_llm=run_llm, answers_path=answers_path)
+        logger.info(f"Warm-up done: {self.warmup_stats}")
+
+    def start_watcher(self, interval):
+        if self.watcher is None:
+            self.watcher = IndexWatcher(self.vectorstore_path, self.reload_vector_store, interval)
+            self.watcher.start()
+
+    def index_status(self):
+        index = self.index
+        return {
+            "index_version": index.version if index else None,
+            "index_loaded_at": index.loaded_at.isoformat() if index else None,
+            "index_load_seconds": round(index.load_seconds, 3) if index else None,
+            "index_path": self.vectorstore_path,
+            "shards": index.vector_store.shard_names if index and isinstance(index.vector_store, ShardedVectorStore) else None,
+            "filter_fields": list(INDEXED_FIELDS),
+            "reload_in_progress": self._reload_lock.locked(),
+            "last_reload_error": self.last_reload_error,
+            "warmup": self.warmup_stats,
+            "warmup_in_progress": self._warmup_lock.locked(),
+            "embedding_cache": self.embedding_cache.stats(),
+            "answer_cache": self.answer_cache.stats(),
+            "prefetch": self.prefetcher.stats() if self.prefetcher else None,
+            "named_indexes": self.registry.stats(),
+        }
+
+    def _validate_query(self, index, shards=None, filter=None):
+        """Raise ValueError if ``shards`` or ``filter`` cannot be served by ``index``."""
+        if isinstance(index.vector_store, ShardedVectorStore):
+            index.vector_store.validate(shards, filter)
+            return
+        if shards:
+            raise ValueError("The loaded vector store is not sharded; 'shards' cannot be used")
+        if filter:
+            index.metadata_index.validate(filter)
+
+    def _search_by_vector(self, index, vector, k=RETRIEVAL_K, shards=None, filter=None):
+        """Return ``(docstore_id, document, score)`` hits, filtering inside FAISS via ID selectors."""
+        if isinstance(index.vector_store, ShardedVectorStore):
+            return index.vector_store.search_by_vector(vector, k=k, shards=shards, filter=filter)
+        ids = index.metadata_index.select(filter) if filter else None
+        return search_faiss(index.vector_store, vector, k, ids)
+
+    def _embed_query(self, question):
+        key = normalize_query(question)
+        vector = self.embedding_cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(question)
+            self.embedding_cache.put(key, vector)
+        return vector
+
+    def search(self, question: str, k: int = RETRIEVAL_K, shards=None, filter=None, index_key=None):
+        if not 1 <= k <= MAX_SEARCH_K:
+            raise ValueError(f"'k' must be between 1 and {MAX_SEARCH_K}")
+        index = self.resolve_index(index_key)
+        if not index:
+            raise RuntimeError("RAG system not initialized properly. Please check your configuration.")
+        return self.search_index(index, question, k=k, shards=shards, filter=filter)
+
+    def search_index(self, index, question: str, k: int = RETRIEVAL_K, shards=None, filter=None):
+        self._validate_query(index, shards, filter)
+        vector = self._embed_query(question)
+        return self._search_by_vector(index, vector, k=k, shards=shards, filter=filter)
+
+    def _generate(self, index, question, docs, deadline=None):
+        payload = {"input_documents": docs, "question": question}
+        if deadline is None:
+            return index.qa_chain.combine_documents_chain.invoke(payload)
+        if deadline.remaining() < LLM_MIN_BUDGET_SECONDS:
+            raise deadline.exceeded("llm")
+
+        # The provider call cannot be interrupted, so wait on it from here and stop
+        # waiting when the budget runs out; the client timeout reaps the call itself
+        future = submit_profiled(self._llm_executor, index.qa_chain.combine_documents_chain.invoke, payload)
         try:
-            result = self.qa_chain.invoke({"query": question})
-            return result["result"]
+            return future.result(timeout=deadline.remaining())
+        except FutureTimeout:
+            future.cancel()
+            raise deadline.exceeded("llm")
+
+    def prefetch(self, session_id, prompt, shards=None, filter=None, index_key=None):
+        """Start speculative retrieval for a prompt still being typed; returns a status string."""
+        if self.prefetcher is None:
+            return "disabled"
+        if self.llm is None or (not index_key and self.index is None):
+            return "not_initialized"
+        return self.prefetcher.submit(session_id, prompt, shards=shards, filter=filter, index_key=index_key)
+
+    def answer(self, question: str, shards=None, filter=None, deadline=None, session_id=None,
+               index_key=None) -> "RAGResult":
+        """
+        Answer ``question``, recording per-stage timings and the retrieved chunk ids.
+
+        With a ``Deadline`` each stage is skipped once the budget is spent; if
+        retrieval finished but the LLM could not, the top snippets are returned.
+        Hits prefetched for ``session_id`` replace embedding and search when the
+        prompt matches. ``index_key`` selects a named index instead of the default.
+        """
+        result = RAGResult()
+        # Pin the current index so a concurrent hot swap or eviction cannot change it mid-request
+        if not index_key:
+            index = self.index
+        elif self.llm is None:
+            index = None
+        else:
+            with result.stage("load_index"):
+                index = self.resolve_index(index_key)
+        if not index:
+            result.answer = "RAG system not initialized properly. Please check your configuration."
+            result.error = "not_initialized"
+            return result
+
+        result.index_version = index.version
+        # Bad shards/filters are the caller's fault; reject them before any stage runs so
+        # errors raised later (provider, langchain) are never mistaken for them
+        self._validate_query(index, shards, filter)
+        # Only plain questions are cached; shard/filter variants are rare and would fragment it
+        cache_key = index.cache_key(question) if not shards and not filter else None
+        if cache_key is not None:
+            cached = self.answer_cache.get(cache_key)
+            if cached is not None:
+                result.answer = cached
+                result.cached = True
+                return result
+
+        prefetched = None
+        if self.prefetcher is not None and session_id:
+            prefetched = self.prefetcher.take(session_id, question, index, shards=shards, filter=filter)
+        hits = prefetched if prefetched is not None else []
+        try:
+            # Same steps as RetrievalQA, split so the search can be narrowed per query
+            if prefetched is None:
+                with result.stage("embed"):
+                    if deadline:
+                        deadline.check("embed")
+                    vector = self._embed_query(question)
+                with result.stage("search"):
+                    if deadline:
+                        deadline.check("search")
+                    hits = self._search_by_vector(index, vector, shards=shards, filter=filter)
+            else:
+                result.prefetched = True
+            result.chunk_ids = [doc_id for doc_id, _, _ in hits]
+            with result.stage("llm"):
+                output = self._generate(index, question, [doc for _, doc, _ in hits], deadline)
+            result.answer = output["output_text"]
+            if cache_key is not None:
+                self.answer_cache.put(cache_key, result.answer)
+        except DeadlineExceeded as e:
+            logger.warning(f"Deadline exceeded at stage '{e.stage}'")
+            result.answer = degraded_answer([doc for _, doc, _ in hits])
+            result.degraded = True
+            result.deadline_exceeded = e.stage
         except Exception as e:
-            print(f"Error getting response: {e}")
-            return f"Sorry, I encountered an error processing your question: {str(e)}"
+            logger.error(f"Error getting response: {e}")
+            result.answer = f"Sorry, I encountered an error processing your question: {str(e)}"
+            result.error = type(e).__name__
+        return result
+
+    def get_response(self, question: str, shards=None, filter=None, index_key=None) -> str:
+        return self.answer(question, shards=shards, filter=filter, index_key=index_key).answer
+
+def degraded_answer(docs):
+    """Fallback reply built from retrieved snippets when there is no time left to generate."""
+    if not docs:
+        return "Sorry, I couldn't answer in time. Please try again in a moment."
+    excerpts = "\n\n".join(
+        f"- {textwrap.shorten(' '.join(doc.page_content.split()), width=300, placeholder='...')}"
+        for doc in docs
+    )
+    return (
+        "I couldn't generate a full answer in time, but here are the most relevant details I found:\n\n"
+        + excerpts
+    )
+
+class RAGResult:
+    """Answer plus what it took to produce it, for tracing and diagnostics."""
+
+    def __init__(self):
+        self.answer = ""
+        self.chunk_ids = []
+        self.timings = {}
+        self.index_version = None
+        self.error = None
+        self.cached = False
+        self.degraded = False
+        self.prefetched = False
+        self.deadline_exceeded = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 2)
 
 # For backward compatibility
 class Retriver:
     def __init__(self, vector_store=None, llm_model=None, config=None):
         self.rag = SimpleRAG()
-    
+
     def load_vector_store(self):
         # Already handled in SimpleRAG setup
         pass
-    
-    def get_response(self, question: str) -> str:
-        return self.rag.get_response(question)
+
+    def reload_vector_store(self, background: bool = True) -> bool:
+        if background:
+            return self.rag.reload_in_background()
+        return self.rag.reload_vector_store()
+
+    def index_status(self) -> dict:
+        return self.rag.index_status()
+
+    def unload_index(self, index_key: str) -> bool:
+        # Also picks up newly published indexes without waiting for the rescan interval
+        self.rag.registry.refresh()
+        return self.rag.registry.unload(index_key)
+
+    def search(self, question: str, k: int = RETRIEVAL_K, shards=None, filter=None, index_key=None):
+        return self.rag.search(question, k=k, shards=shards, filter=filter, index_key=index_key)
+
+    def prefetch(self, session_id: str, prompt: str, shards=None, filter=None, index_key=None) -> str:
+        return self.rag.prefetch(session_id, prompt, shards=shards, filter=filter, index_key=index_key)
+
+    def answer(self, question: str, shards=None, filter=None, deadline=None, session_id=None,
+               index_key=None) -> RAGResult:
+        return self.rag.answer(
+            question, shards=shards, filter=filter, deadline=deadline, session_id=session_id, index_key=index_key
+        )
+
+    def get_response(self, question: str, shards=None, filter=None, index_key=None) -> str:
+        return self.rag.get_response(question, shards=shards, filter=filter, index_key=index_key)
 
 class VectorStore:
     def __init__(self, config=None):
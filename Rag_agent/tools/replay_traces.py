@@ -0,0 +1,108 @@
+"""
+Replay captured chat traces against a running server.
+
+Reads the JSON-lines files written when TRACE_ENABLED=true (logs/traces/traces.jsonl
+and its rotated siblings) and re-sends each prompt to /api/chat, keeping the
+original inter-arrival gaps divided by --speed. Records captured with
+TRACE_PROMPTS=hash carry no prompt text and are skipped.
+
+Usage (from Rag_agent/):
+    python tools/replay_traces.py logs/traces/traces.jsonl.1 logs/traces/traces.jsonl \\
+        --url http://localhost:8000 --speed 4
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.common.tracing import read_traces
+
+
+def send(url, record, timeout):
+    body = {"prompt": record["prompt"], "session_id": record.get("session")}
+    for key in ("index", "shards", "filter"):
+        if record.get(key):
+            body[key] = record[key]
+    req = urllib.request.Request(
+        url.rstrip("/") + "/api/chat",
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = None
+    return status, (time.perf_counter() - start) * 1000
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="+", help="trace files, oldest first")
+    parser.add_argument("--url", default="http://localhost:8000", help="server base URL")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale: 2 replays twice as fast, 0 sends as fast as possible")
+    parser.add_argument("--limit", type=int, default=None, help="replay at most this many requests")
+    parser.add_argument("--workers", type=int, default=32, help="maximum concurrent requests")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    args = parser.parse_args()
+
+    records = [r for r in read_traces(args.traces) if r.get("prompt")]
+    records.sort(key=lambda r: r["ts"])
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        print("No replayable records (prompts may have been captured as hashes only)")
+        return
+
+    print(f"Replaying {len(records)} requests against {args.url} at {args.speed}x")
+    latencies, failures = [], 0
+    lock = threading.Lock()
+
+    def run(record):
+        nonlocal failures
+        status, ms = send(args.url, record, args.timeout)
+        with lock:
+            if status == 200:
+                latencies.append(ms)
+            else:
+                failures += 1
+
+    first_ts = records[0]["ts"]
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for record in records:
+            if args.speed > 0:
+                delay = (record["ts"] - first_ts) / args.speed - (time.perf_counter() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(run, record)
+    elapsed = time.perf_counter() - wall_start
+
+    print(f"Done in {elapsed:.1f}s: {len(latencies)} ok, {failures} failed, {len(records) / elapsed:.2f} req/s")
+    print(
+        f"latency ms: p50={percentile(latencies, 50):.0f} p95={percentile(latencies, 95):.0f} "
+        f"p99={percentile(latencies, 99):.0f} max={max(latencies, default=0):.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
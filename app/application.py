@@ -4,6 +4,9 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
 import sys
+import hmac
+import time
+import tracemalloc
 import logging
 from dotenv import load_dotenv
 
@@ -11,8 +14,13 @@ from dotenv import load_dotenv
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Rag_agent'))
 
 try:
-    from simplified_rag import Retriver, VectorStore, LLMModel
+    from simplified_rag import MAX_SEARCH_K, Retriver, VectorStore, LLMModel
     from app.config.config_class import Config
+    from app.common.tracing import trace_recorder
+    from app.common.profiling import ProfileStore, memory_report, profile_requested
+    from app.common.deadline import DEADLINE_HEADER, Deadline, deadline_stats
+    from app.common.logger import logging_stats
+    from app.components.prefetch import is_shared_session
 except ImportError as e:
     print(f"Warning: Could not import RAG components: {e}")
     print("RAG functionality will not be available")
@@ -30,12 +38,26 @@ logger = logging.getLogger(__name__)
 
 # Global RAG components
 retriever = None
+profile_store = None
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def check_admin_token():
+    """Return an error response if the request lacks a valid admin token, else None"""
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled. Set ADMIN_TOKEN to enable them."}), 403
+    # Constant-time compare; bytes so non-ASCII or missing tokens can't raise
+    token = request.headers.get('X-Admin-Token') or ''
+    if not hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        return jsonify({"error": "Invalid admin token"}), 401
+    return None
 
 def initialize_rag():
     """Initialize RAG components"""
-    global retriever
+    global retriever, profile_store
     try:
         logger.info("Initializing RAG components...")
+        profile_store = ProfileStore.from_env()
         config = Config()
         vector_store = VectorStore(config)
         llm_model = LLMModel(config)
@@ -72,6 +94,8 @@ def chat():
         
         prompt = data['prompt']
         session_id = data.get('session_id', 'default')
+        shards = data.get('shards')
+        metadata_filter = data.get('filter')
         
         if retriever is None:
             return jsonify({
@@ -80,18 +104,54 @@ def chat():
                 "sources": []
             }), 503
         
+        # Profiling is opt-in per request and admin-only
+        profiling = profile_requested(request.headers.get('X-Debug-Profile') or request.args.get('profile'))
+        if profiling:
+            error = check_admin_token()
+            if error:
+                return error
+
+        try:
+            deadline = Deadline.from_header(request.headers.get(DEADLINE_HEADER))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        started_at = time.time()
+        index_key = data.get('index')
+        trace = dict(session_id=session_id, shards=shards, filter=metadata_filter, index=index_key)
+
         # Get response from RAG system
+        result = None
+        profile_id = None
         try:
-            answer = retriever.get_response(prompt)
+            rag_kwargs = dict(
+                shards=shards, filter=metadata_filter, deadline=deadline, session_id=data.get('session_id'),
+                index_key=index_key
+            )
+            if profiling:
+                result, profile_id = profile_store.profile(retriever.answer, prompt, **rag_kwargs)
+            else:
+                result = retriever.answer(prompt, **rag_kwargs)
+            answer = result.answer
+        except ValueError as e:
+            trace_recorder.record("flask", prompt, started_at, status=400, **trace)
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             logger.error(f"Error getting RAG response: {e}")
             answer = f"I apologize, but I encountered an error while processing your question: {str(e)}. Please try asking something else."
+
+        trace_recorder.record("flask", prompt, started_at, result=result,
+                              response_bytes=len(answer.encode("utf-8")), **trace)
         
-        return jsonify({
+        response = jsonify({
             "answer": answer,
             "session_id": session_id,
-            "sources": []  # You can extend this to return source documents
+            "sources": [],  # You can extend this to return source documents
+            "degraded": bool(result and result.degraded)
         })
+        if profile_id:
+            response.headers['X-Profile-Id'] = profile_id
+        return response
         
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
@@ -99,6 +159,55 @@ def chat():
             "error": f"Internal server error: {str(e)}"
         }), 500
 
+@app.route('/api/prefetch', methods=['POST'])
+def prefetch():
+    """Speculatively retrieve for a prompt the user is still typing; /api/chat reuses the result"""
+    data = request.get_json()
+    if not data or 'prompt' not in data or not data.get('session_id'):
+        return jsonify({"error": "Missing 'prompt' or 'session_id' field in request"}), 400
+    if is_shared_session(data['session_id']):
+        return jsonify({"error": "'session_id' must be unique per visitor"}), 400
+
+    if retriever is None:
+        return jsonify({"error": "RAG system not initialized"}), 503
+
+    status = retriever.prefetch(
+        data['session_id'], data['prompt'], shards=data.get('shards'), filter=data.get('filter'),
+        index_key=data.get('index')
+    )
+    return jsonify({"status": status, "session_id": data['session_id']}), 202
+
+@app.route('/api/search', methods=['POST'])
+def search():
+    """Vector search with optional shard and metadata filters, no generation"""
+    data = request.get_json()
+    if not data or 'query' not in data:
+        return jsonify({"error": "Missing 'query' field in request"}), 400
+
+    if retriever is None:
+        return jsonify({"error": "RAG system not initialized"}), 503
+
+    try:
+        hits = retriever.search(
+            data['query'],
+            k=max(1, min(int(data.get('k', 3)), MAX_SEARCH_K)),
+            shards=data.get('shards'),
+            filter=data.get('filter'),
+            index_key=data.get('index')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in search endpoint: {e}")
+        return jsonify({"error": f"Error searching: {str(e)}"}), 500
+
+    return jsonify({
+        "results": [
+            {"id": doc_id, "content": doc.page_content, "metadata": doc.metadata, "score": score}
+            for doc_id, doc, score in hits
+        ]
+    })
+
 @app.route('/api/status', methods=['GET'])
 def status():
     """Get detailed status of the RAG system"""
@@ -113,11 +222,75 @@ def status():
         try:
             rag_status["model_loaded"] = hasattr(retriever, 'rag') and retriever.rag is not None and hasattr(retriever.rag, 'llm')
             rag_status["vector_store_loaded"] = hasattr(retriever, 'rag') and retriever.rag is not None and hasattr(retriever.rag, 'vector_store')
+            rag_status.update(retriever.index_status())
+            rag_status["deadline_exceeded"] = deadline_stats.snapshot()
+            rag_status["logging"] = logging_stats()
         except:
             pass
     
     return jsonify(rag_status)
 
+@app.route('/api/admin/reload', methods=['POST'])
+def reload_index():
+    """Load the rebuilt vector store in the background and hot-swap it in"""
+    error = check_admin_token()
+    if error:
+        return error
+
+    if retriever is None:
+        return jsonify({"error": "RAG system not initialized"}), 503
+
+    # Named indexes are reloaded lazily: drop the resident copy and the next request loads it from disk
+    index_key = request.args.get('index')
+    if index_key:
+        unloaded = retriever.unload_index(index_key)
+        return jsonify({
+            "index": index_key,
+            "unloaded": unloaded,
+            "message": "Index will be reloaded on next use" if unloaded else "Index was not loaded"
+        }), 202
+
+    try:
+        started = retriever.reload_vector_store(background=True)
+    except Exception as e:
+        logger.error(f"Error starting index reload: {e}")
+        return jsonify({"error": f"Error starting index reload: {str(e)}"}), 500
+
+    return jsonify({
+        "reload_started": started,
+        "message": "Reload started; poll /api/status for the active index version" if started else "A reload is already in progress",
+        **retriever.index_status()
+    }), 202
+
+@app.route('/debug/memory', methods=['GET'])
+def debug_memory():
+    """Process RSS, tracemalloc top allocators (start with ?tracemalloc=start) and RAG component sizes"""
+    error = check_admin_token()
+    if error:
+        return error
+
+    action = request.args.get('tracemalloc')
+    if action == 'start' and not tracemalloc.is_tracing():
+        tracemalloc.start(int(os.getenv("TRACEMALLOC_FRAMES", "1")))
+    elif action == 'stop' and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return jsonify(memory_report(retriever.rag if retriever is not None else None, top=int(request.args.get('top', 15))))
+
+@app.route('/debug/profiles/<profile_id>', methods=['GET'])
+def debug_profile(profile_id):
+    """Folded stacks of a profiled request, ready for flamegraph.pl or speedscope"""
+    error = check_admin_token()
+    if error:
+        return error
+
+    if profile_store is None:
+        return jsonify({"error": "RAG system not initialized"}), 503
+
+    folded = profile_store.load(profile_id)
+    if folded is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return folded, 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
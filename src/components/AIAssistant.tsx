@@ -3,6 +3,7 @@ import { Bot, Upload, MessageCircle, Code, FileText } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Input } from '@/components/ui/input';
+import { chatSessionId } from '@/lib/session';
 import { Textarea } from '@/components/ui/textarea';
 import { useToast } from '@/hooks/use-toast';
 import { supabase } from '@/integrations/supabase/client';
@@ -127,7 +128,7 @@ const AIAssistant = () => {
         },
         body: JSON.stringify({
           prompt: inputMessage,
-          session_id: 'portfolio_chat'
+          session_id: chatSessionId
         }),
       });
 
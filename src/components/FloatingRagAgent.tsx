@@ -5,6 +5,7 @@ import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Input } from '@/components/ui/input';
 import { ScrollArea } from '@/components/ui/scroll-area';
 import { Badge } from '@/components/ui/badge';
+import { chatSessionId } from '@/lib/session';
 
 interface Message {
   role: 'user' | 'assistant';
@@ -81,6 +82,26 @@ const FloatingRagAgent = () => {
     }
   }, [isOpen]);
 
+  // Prefetch retrieval for the prompt being typed once the user pauses
+  useEffect(() => {
+    if (!apiStatus.isInitialized || isLoading || inputMessage.trim().length < 8) return;
+
+    const timer = setTimeout(() => {
+      fetch(`${import.meta.env.VITE_RAG_API_URL || 'http://localhost:8000'}/api/prefetch`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          prompt: inputMessage,
+          session_id: chatSessionId
+        }),
+      }).catch(() => {});
+    }, 400);
+
+    return () => clearTimeout(timer);
+  }, [inputMessage, apiStatus.isInitialized, isLoading]);
+
   const handleSendMessage = async () => {
     if (!inputMessage.trim() || isLoading) return;
 
@@ -120,7 +141,7 @@ const FloatingRagAgent = () => {
         },
         body: JSON.stringify({ 
           prompt: userMessage,
-          session_id: 'portfolio_chat'
+          session_id: chatSessionId
         }),
       });
 
@@ -0,0 +1,5 @@
+// One id per browser tab, so the RAG backend can keep per-visitor state (e.g. prefetched retrieval) apart
+export const chatSessionId: string =
+  typeof crypto !== "undefined" && typeof crypto.randomUUID === "function"
+    ? crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`